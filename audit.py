@@ -0,0 +1,130 @@
+"""
+Check every race in a tournament log against the rules and the optimal step counts.
+
+    python audit.py tournament_log.jsonl
+    python audit.py tournament_log.jsonl --certificates certificates.json
+
+Each history is replayed in one vectorised pass (see `game_world.verify`), and each
+finish is compared with a certified optimum (see `game_world.certificate`), which is
+computed and checked once per track.
+"""
+
+import argparse
+import json
+import os
+from time import perf_counter
+
+from game import TIMED_OUT
+from game_world.certificate import Certificate, certify, check_certificate
+from game_world.racetrack import RaceTrack, load_track
+from game_world.state_space import ToggleModel
+from game_world.verify import HistoryCheck, verify_history
+from tournament import max_turns_without_progress, read_log
+
+
+def load_certificates(filename: str) -> dict[str, Certificate]:
+    if not os.path.exists(filename):
+        return {}
+    with open(filename) as f:
+        return {k: Certificate.from_dict(v) for k, v in json.load(f).items()}
+
+
+def save_certificates(filename: str, certificates: dict[str, Certificate]) -> None:
+    with open(filename, "w") as f:
+        json.dump({k: v.to_dict() for k, v in certificates.items()}, f)
+
+
+def check_record(record: dict, model: ToggleModel) -> tuple[HistoryCheck, str | None]:
+    """
+    Replay one logged race.
+
+    Returns:
+        tuple[HistoryCheck, str | None]: The replay, and why the log disagrees with it
+            (None if it doesn't).
+    """
+    # moves that weren't a pair of numbers are logged as their repr
+    history = [
+        tuple(move) if isinstance(move, list) else move for move in record["history"]
+    ]
+    if record["message"] == TIMED_OUT:
+        # the move that ran out the clock is logged but never played
+        history = history[:-1]
+    limit = record.get(
+        "max_turns_without_progress", max_turns_without_progress(record["track"])
+    )
+    check = verify_history(model, history, limit)
+    replayed = check.message or "still racing"
+    if check.extra_moves:
+        return check, f"{check.extra_moves} moves logged after the race ended"
+    if record["status"] == "FINISH":
+        if not check.finished or check.steps != record["steps"]:
+            return check, f"logged as a finish but replays as {replayed!r}"
+    elif check.message is not None and check.message != record["message"]:
+        return check, f"logged as {record['message']!r} but replays as {replayed!r}"
+    return check, None
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("log", help="tournament results log (JSONL)")
+    parser.add_argument(
+        "--certificates", help="JSON file to keep certificates in between runs"
+    )
+    args = parser.parse_args()
+
+    start = perf_counter()
+    certificates = load_certificates(args.certificates) if args.certificates else {}
+    tracks: dict[str, RaceTrack] = {}
+    models: dict[str, ToggleModel] = {}
+    optimal: dict[str, int | None] = {}
+    races: dict[str, int] = {}
+    optimal_finishes: dict[str, int] = {}
+    extra_steps: dict[str, int] = {}
+    disputes = 0
+    records = read_log(args.log)
+    for record in records:
+        if record["track"] not in tracks:
+            tracks[record["track"]] = load_track(record["track"])
+        track = tracks[record["track"]]
+        fingerprint = track.fingerprint
+        if record.get("fingerprint", fingerprint) != fingerprint:
+            print(f"{record['track']} has changed since {record['bot']} raced it")
+            disputes += 1
+            continue
+        if fingerprint not in optimal:
+            if fingerprint not in certificates:
+                certificates[fingerprint] = certify(track)
+            problems = check_certificate(track, certificates[fingerprint])
+            if problems:
+                raise ValueError(f"Bad certificate for {record['track']}: {problems}")
+            optimal[fingerprint] = certificates[fingerprint].optimal_steps
+            models[fingerprint] = ToggleModel(track)
+
+        bot = record["bot"]
+        races[bot] = races.get(bot, 0) + 1
+        check, dispute = check_record(record, models[fingerprint])
+        if dispute:
+            disputes += 1
+            print(f"{bot} on {record['track']} (seed {record['seed']}): {dispute}")
+        elif check.finished:
+            gap = check.steps - optimal[fingerprint]
+            if gap < 0:
+                raise ValueError(f"{bot} beat the certified optimum on {record['track']}")
+            optimal_finishes[bot] = optimal_finishes.get(bot, 0) + (gap == 0)
+            extra_steps[bot] = extra_steps.get(bot, 0) + gap
+
+    if args.certificates:
+        save_certificates(args.certificates, certificates)
+    for bot, count in races.items():
+        print(
+            f"{bot}: {optimal_finishes.get(bot, 0)}/{count} races finished optimally, "
+            f"{extra_steps.get(bot, 0)} steps over optimal in total"
+        )
+    print(
+        f"Audited {len(records)} races on {len(optimal)} tracks in "
+        f"{perf_counter() - start:.2f}s, {disputes} disputed"
+    )
+
+
+if __name__ == "__main__":
+    main()
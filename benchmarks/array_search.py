@@ -0,0 +1,42 @@
+"""
+Compare the dict based breadth first search with the flat array engine on large tracks.
+Run from the repo root with `python -m benchmarks.array_search`.
+"""
+
+from time import perf_counter
+
+from benchmarks.bidirectional import arena, scale_track
+from game_world.array_search import ArraySearch
+from game_world.pruning import prune
+from game_world.racetrack import RaceTrack, load_track
+from game_world.search import forward_search
+from game_world.state_space import ToggleModel
+
+
+def run(name: str, track: RaceTrack) -> None:
+    model = prune(ToggleModel(track))
+    start = perf_counter()
+    path, expanded = forward_search(model)
+    dict_time = perf_counter() - start
+    start = perf_counter()
+    engine = ArraySearch(model)
+    array_path, _ = engine.search()
+    array_time = perf_counter() - start
+    assert len(path) == len(array_path), name
+    print(
+        f"{name:<16} {len(path):>5} steps {expanded:>8} states  "
+        f"dict {dict_time:6.2f}s  array {array_time:6.2f}s "
+        f"({dict_time / array_time:.1f}x, {engine.memory_bytes / 2**20:.1f}MiB)"
+    )
+
+
+def main():
+    extreme = load_track("tracks/extreme.pkl")
+    for k in (1, 2, 3):
+        run(f"extreme x{k}", scale_track(extreme, k))
+    for size in (300, 600):
+        run(f"arena {size}", arena(size, size // 2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,103 @@
+"""
+Compare states expanded by best_bot's single-direction A*, a forward breadth first
+search on the same state model as the bidirectional search, and the bidirectional search.
+Run from the repo root with `python -m benchmarks.bidirectional`.
+"""
+
+from time import perf_counter
+
+import numpy as np
+
+from best_bot import best_bot
+from game_world.pruning import prune
+from game_world.racetrack import RaceTrack, blank_track, load_track
+from game_world.search import forward_search
+from game_world.state_space import ToggleModel
+
+SCALES = (1, 2)
+
+
+def scale_track(track: RaceTrack, k: int) -> RaceTrack:
+    """
+    Blow every cell up into a k x k block. Buttons stay a single cell in the
+    corner of their block, otherwise crossing a block would press them several times.
+    """
+    block = np.ones((k, k))
+    corner = np.zeros((k, k))
+    corner[0, 0] = 1
+    return RaceTrack(
+        np.kron(track.walls, block),
+        np.kron(track.active, block),
+        np.kron(track.buttons, corner),
+        np.kron(track.wall_colors, block),
+        np.kron(track.button_colors, corner),
+        (track.target[0] * k + k - 1, track.target[1] * k + k - 1),
+        (track.spawn[0] * k, track.spawn[1] * k),
+        track.screen_size,
+    )
+
+
+def open_field(size: int) -> RaceTrack:
+    """Square arena with a single wall across the middle and a button to open it."""
+    track = blank_track((size, size), (800, 800), 7)
+    mid = size // 2
+    track.walls[mid, :] = 1
+    track.wall_colors[mid, :] = 2
+    track.buttons[mid - 1, 0] = 1
+    track.button_colors[mid - 1, 0] = 2
+    return track
+
+
+def timed(search) -> tuple[int, int, float]:
+    start = perf_counter()
+    steps, expanded = search()
+    return steps, expanded, perf_counter() - start
+
+
+def arena(size: int, gap: int) -> RaceTrack:
+    """Empty arena with spawn and target `gap` cells apart in the middle."""
+    track = blank_track((size, size), (800, 800), 7)
+    mid = size // 2
+    track.spawn = (mid - gap // 2, mid)
+    track.target = (mid + gap // 2, mid)
+    return track
+
+
+def run(name: str, track: RaceTrack) -> None:
+    def astar() -> tuple[int, int]:
+        bot = best_bot()
+        return len(bot.astar(track.spawn, track.target, track)), bot.expanded
+
+    def forward() -> tuple[int, int]:
+        path, expanded = forward_search(prune(ToggleModel(track)))
+        return len(path), expanded
+
+    def bidirectional() -> tuple[int, int]:
+        bot = best_bot(search="bidirectional")
+        return len(bot.bidirectional(track.spawn, track.target, track)), bot.expanded
+
+    results = {
+        label: timed(search)
+        for label, search in (("A*", astar), ("BFS", forward), ("bidir", bidirectional))
+    }
+    lengths = {steps for steps, _, _ in results.values()}
+    assert len(lengths) == 1, f"{name}: path lengths differ {results}"
+    bi = results["bidir"][1]
+    columns = "  ".join(
+        f"{label} {expanded:>7} ({seconds:6.2f}s, {expanded / max(bi, 1):.2f}x)"
+        for label, (_, expanded, seconds) in results.items()
+    )
+    print(f"{name:<20} {lengths.pop():>5} steps  {columns}")
+
+
+def main():
+    for k in SCALES:
+        run(f"extreme x{k}", scale_track(load_track("tracks/extreme.pkl"), k))
+    for size in (40, 80):
+        run(f"open field {size}x{size}", open_field(size))
+    for gap in (50, 100):
+        run(f"arena gap {gap}", arena(300, gap))
+
+
+if __name__ == "__main__":
+    main()
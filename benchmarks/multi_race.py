@@ -0,0 +1,77 @@
+"""
+Ticks per second of the shared-track multi racer engine as the number of racers grows,
+next to the same racers each running their own `Game` (one track copy per racer).
+Run from the repo root with `python -m benchmarks.multi_race`.
+"""
+
+import random
+from time import perf_counter
+
+from game import Game, Point, Status
+from benchmarks.bidirectional import open_field
+from game_world.racetrack import RaceTrack
+from multi_race import MultiGame
+
+TICKS = 200
+RACER_COUNTS = (1, 10, 100, 1000)
+
+
+def wanderer(seed: int):
+    """Cheap racer that takes a random legal step, so the engine dominates the timing."""
+    rng = random.Random(seed)
+
+    def move(loc: Point, track: RaceTrack) -> Point:
+        rows, cols = track.shape
+        options = [
+            (dr, dc)
+            for dr, dc in ((1, 0), (-1, 0), (0, 1), (0, -1))
+            if 0 <= loc[0] + dr < rows
+            and 0 <= loc[1] + dc < cols
+            and track.is_traversable((loc[0] + dr, loc[1] + dc))
+        ]
+        return rng.choice(options) if options else (1, 0)
+
+    return move
+
+
+def shared(track: RaceTrack, k: int) -> tuple[float, int]:
+    game = MultiGame([wanderer(i) for i in range(k)], track, float("inf"), 0)
+    start = perf_counter()
+    for _ in range(TICKS):
+        if not game.tick():
+            break
+    elapsed = perf_counter() - start
+    return game.ticks / elapsed, game.status.count(Status.ONGOING)
+
+
+def separate(track: RaceTrack, k: int) -> float:
+    games = [Game(wanderer(i), track, float("inf"), 0) for i in range(k)]
+    ongoing = [True] * k
+    start = perf_counter()
+    ticks = 0
+    for ticks in range(1, TICKS + 1):
+        for i, game in enumerate(games):
+            if ongoing[i]:
+                ongoing[i] = game.tick()[0] == Status.ONGOING
+        if not any(ongoing):
+            break
+    return ticks / (perf_counter() - start)
+
+
+def main():
+    # open enough that wandering racers never get boxed in and drop out early
+    track = open_field(100)
+    for k in RACER_COUNTS:
+        shared_rate, racing = shared(track, k)
+        line = (
+            f"K={k:<5} shared {shared_rate:9.1f} ticks/s "
+            f"({shared_rate * k:9.0f} moves/s, {racing} still racing)"
+        )
+        if k <= 100:
+            separate_rate = separate(track, k)
+            line += f"   separate games {separate_rate:9.1f} ticks/s"
+        print(line)
+
+
+if __name__ == "__main__":
+    main()
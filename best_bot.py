@@ -1,7 +1,13 @@
 from collections import deque
 import heapq
 from game_world.racetrack import RaceTrack
+from game_world.array_search import ArraySearch
+from game_world.corridors import CorridorGraph
+from game_world.pruning import prune, relevant_colors
+from game_world.search import bidirectional_search
+from game_world.state_space import ToggleModel
 from copy import deepcopy
+import numpy as np
 
 Point = tuple[int, int]
 
@@ -11,16 +17,62 @@ class best_bot:
     class for the bot\n
     use in game.py:\n
         from best_bot import best_bot
-        PLAYER = best_bot()
+        PLAYER = best_bot()\n
+    for big open tracks, search from both ends instead:\n
+        PLAYER = best_bot(search="bidirectional")\n
+    for corridor-heavy mazes, search the contracted corridor graph:\n
+        PLAYER = best_bot(search="corridors")\n
+    for tracks with 100k+ search states, use the vectorised array engine:\n
+        PLAYER = best_bot(search="array")\n
+    (it is slower than the default on every bundled track, extreme.pkl included)\n
+    planning happens in prepare() before the clock starts, and plans are cached
+    per track so a bot reused across races never plans the same track twice
     """
 
-    def __init__(self) -> None:
+    def __init__(self, search: str = "astar") -> None:
+        if search not in ("astar", "bidirectional", "corridors", "array"):
+            raise ValueError(f"Unknown search mode {search!r}")
+        self.search = search
         self.first_run: bool = True
+        # states popped by the last search, for benchmarking
+        self.expanded: int = 0
+        # (track fingerprint, start) -> planned path, kept across races
+        self.plans: dict[tuple[str, Point], deque[Point]] = dict()
         self.current_path: deque[Point] = deque()
+        # colors whose toggles can change a legal move, None until searched
+        self.relevant: set[int] | None = None
+        self.relevant_walls: np.ndarray | None = None
 
     def __call__(self, location: Point, map: RaceTrack) -> Point:
         return self.best_move(location, map)
 
+    def reset(self) -> None:
+        """
+        forget the current race, cached plans are kept
+        """
+        self.first_run = True
+        self.current_path = deque()
+
+    def prepare(self, map: RaceTrack) -> None:
+        """
+        plan the whole race before the first move
+        """
+        self.current_path = self.plan(map.spawn, map)
+        self.first_run = False
+
+    def plan(self, location: Point, map: RaceTrack) -> deque[Point]:
+        """
+        path from location to the target, reusing a cached plan for the same track
+
+        :return: sequence of cells from location to target
+        :rtype: deque[Point]
+        """
+        key = (map.fingerprint, location)
+        if key not in self.plans:
+            search = getattr(self, self.search)
+            self.plans[key] = search(location, map.target, map)
+        return deque(self.plans[key])
+
 
     def dist(self, p1: Point, p2: Point) -> int:
         """
@@ -44,12 +96,16 @@ class best_bot:
     def searialize(self, map: RaceTrack) -> bytes:
         """
         hashable active array from map\n
-        useful for comparing game states
+        useful for comparing game states\n
+        only walls of relevant colors are included, so states differing
+        in toggles that never matter compare equal
         
         :return: bytes of active array
         :rtype: bytes
         """
-        return map.active.tobytes()
+        if self.relevant_walls is None:
+            return map.active.tobytes()
+        return map.active[self.relevant_walls].tobytes()
 
     def tvrs_neighbors(
         self,
@@ -82,8 +138,10 @@ class best_bot:
         :rtype: RaceTrack
         """
         # cell is location after move, not vector
-        if cell in map.find_buttons():
+        if map.buttons[cell]:
             color = map.button_colors[cell]
+            if self.relevant is not None and color not in self.relevant:
+                return map
             new_map = deepcopy(map)
             new_map.toggle(color)
             return new_map
@@ -109,6 +167,15 @@ class best_bot:
         path: deque[Point] = deque()
         end_state: bytes | None = None
         tiebreaker: int = 0
+        self.expanded = 0
+
+        # collapse toggle bits that can never change a legal move
+        model = ToggleModel(starting_map)
+        model.spawn = model.index(starting_point)
+        self.relevant = set(relevant_colors(model))
+        self.relevant_walls = (starting_map.walls != 0) & np.isin(
+            starting_map.wall_colors, list(self.relevant)
+        )
 
         # add first cell to frontier
         # tuple is f-score, g-score, cell:point, tiebreaker, map at that point
@@ -135,6 +202,7 @@ class best_bot:
                 _, # unpack tiebreaker but never use it
                 current_map
             ) = heapq.heappop(frontier)
+            self.expanded += 1
 
             if current_position == target:
                 end_state = self.searialize(current_map) 
@@ -181,6 +249,73 @@ class best_bot:
         path.popleft()
         return path
 
+    def bidirectional(
+        self,
+        starting_point: Point,
+        target: Point,
+        starting_map: RaceTrack,
+    ) -> deque[Point]:
+        """
+        finds shortest path by searching from both the start and the target\n
+        see game_world.search.bidirectional_search
+
+        :return: sequence of cells from starting point to target
+        :rtype: deque[Point]
+        """
+        model = self.toggle_model(starting_point, target, starting_map)
+        cells, self.expanded = bidirectional_search(model)
+        return deque(model.point(cell) for cell in cells)
+
+    def corridors(
+        self,
+        starting_point: Point,
+        target: Point,
+        starting_map: RaceTrack,
+    ) -> deque[Point]:
+        """
+        finds shortest path on the graph with corridors contracted into single edges\n
+        see game_world.corridors.CorridorGraph
+
+        :return: sequence of cells from starting point to target
+        :rtype: deque[Point]
+        """
+        model = self.toggle_model(starting_point, target, starting_map)
+        cells, self.expanded = CorridorGraph(model).search()
+        return deque(model.point(cell) for cell in cells)
+
+    def array(
+        self,
+        starting_point: Point,
+        target: Point,
+        starting_map: RaceTrack,
+    ) -> deque[Point]:
+        """
+        finds shortest path with whole search layers expanded at once on flat arrays\n
+        see game_world.array_search.ArraySearch
+
+        :return: sequence of cells from starting point to target
+        :rtype: deque[Point]
+        """
+        model = self.toggle_model(starting_point, target, starting_map)
+        cells, self.expanded = ArraySearch(model).search()
+        return deque(model.point(cell) for cell in cells)
+
+    def toggle_model(
+        self, starting_point: Point, target: Point, starting_map: RaceTrack
+    ) -> ToggleModel:
+        """
+        pruned toggle model of the map with the search ends set
+
+        :return: model to search on
+        :rtype: ToggleModel
+        """
+        model = ToggleModel(starting_map)
+        model.spawn = model.index(starting_point)
+        model.target = model.index(target)
+        # the map passed in already has any button under us pressed
+        model.start_mask = 0
+        return prune(model)
+
     def best_move(self, location: Point, map: RaceTrack) -> Point:
         """
         return optimal move
@@ -190,11 +325,7 @@ class best_bot:
         """
         # on first move
         if self.first_run:
-            self.current_path = self.astar(
-                location,
-                map.target,
-                map,
-            )
+            self.current_path = self.plan(location, map)
             self.first_run = False
 
         if self.current_path:
@@ -1,8 +1,8 @@
 from copy import deepcopy
 from enum import Enum
 import sys
-from time import monotonic
-from typing import Callable
+from time import monotonic, process_time, thread_time
+from typing import Callable, Protocol, runtime_checkable
 
 import pygame
 import pygame.locals
@@ -18,6 +18,8 @@ SHOW_REPLAY = True
 CLOCK = 10
 DELAY = 5
 MAX_TURNS_WITHOUT_PROGRESS = None  # None means no limit
+CALIBRATE = False  # scale CPU budgets by this machine's speed on a reference workload
+PREPARE_TIME = None  # seconds allowed for a racer's prepare phase, None means untimed
 
 
 Point = tuple[int, int]
@@ -26,12 +28,103 @@ Player = Callable[
 ]  # (location, velocity, track) -> change_in_velocity
 
 
+@runtime_checkable
+class PreparedPlayer(Protocol):
+    """
+    A racer that wants to plan before the clock starts, and can be reused between races.
+
+    `Game` calls `reset()` and then `prepare(track)` once before the first move, with the
+    same view of the track the first move will get. Preparation is charged against its
+    own budget (or not at all), never against the race clock. Anything a bot keeps
+    across `reset()` (caches keyed by track, say) stays warm for the next race.
+    """
+
+    def __call__(self, location: Point, track: RaceTrack) -> Point: ...
+
+    def prepare(self, track: RaceTrack) -> None: ...
+
+    def reset(self) -> None: ...
+
+
 class Status(Enum):
     ONGOING = 1
     FINISH = 2
     DNF = 3
 
 
+# How races end, in the words logged for them. Anything that judges a race from its
+# moves (see `game_world.verify`) builds its verdict from these too.
+TIMED_OUT = "Timed Out"
+OUT_OF_BOUNDS = "Racer went out of bounds!"
+CRASHED_INTO_WALL = "Racer crashed into a wall!"
+
+
+def illegal_move_message(action) -> str:
+    return f"Racer made illegal move {action}!"
+
+
+def dawdling_message(turns: int) -> str:
+    return f"Racer spent {turns} ticks dawdling!"
+
+
+def finish_message(steps: int) -> str:
+    return f"Racer made it to the finish line in {steps} steps!"
+
+
+class Timing(Enum):
+    """
+    Which clock a racer's thinking time is charged against.
+    WALL is affected by everything else running on the machine. The CPU clocks only
+    count time the racer actually spent computing, so results don't depend on load.
+    THREAD_CPU misses work a racer hands off to other threads, PROCESS_CPU does not
+    but also counts anything else running in the same process.
+    """
+
+    WALL = 1
+    THREAD_CPU = 2
+    PROCESS_CPU = 3
+
+
+CLOCKS: dict[Timing, Callable[[], float]] = {
+    Timing.WALL: monotonic,
+    Timing.THREAD_CPU: thread_time,
+    Timing.PROCESS_CPU: process_time,
+}
+TIMING = Timing.WALL
+# CPU seconds `reference_workload` takes on the machine CLOCK and DELAY were set for:
+# best of 7 runs of `measure_reference` on CPython 3.11.7, x86_64 Intel Xeon
+REFERENCE_SECONDS = 0.184
+
+
+def reference_workload() -> int:
+    """Fixed pure python busy work, roughly the kind of thing a search bot does."""
+    seen = {}
+    total = 0
+    for i in range(400_000):
+        key = (i % 997, i % 389)
+        seen[key] = seen.get(key, 0) + 1
+        total += seen[key]
+    return total
+
+
+def measure_reference(repeats: int = 3) -> float:
+    """Best thread CPU time of the reference workload on this machine, in seconds."""
+    best = float("inf")
+    for _ in range(repeats):
+        start = thread_time()
+        reference_workload()
+        best = min(best, thread_time() - start)
+    return best
+
+
+def calibrate(repeats: int = 3) -> float:
+    """
+    Time the reference workload and return the factor to multiply measured CPU
+    time by, so a slower machine charges racers less for the same work.
+    """
+    return REFERENCE_SECONDS / measure_reference(repeats)
+
+
 def manhattan_dist(a: Point, b: Point) -> int:
     return abs(a[0] - b[0]) + abs(a[1] - b[1])
 
@@ -45,6 +138,9 @@ class Game:
         time: float,
         delay: float,
         max_turns_without_progress: int | None = None,
+        timing: Timing = Timing.WALL,
+        time_scale: float = 1.0,
+        prepare_time: float | None = None,
     ) -> None:
         self.player = player
         self.track = deepcopy(track)
@@ -57,12 +153,55 @@ class Game:
         self.pos = track.spawn
         self.min_dist = float("inf")
         self.history = []
+        self.timing = timing
+        self.clock = CLOCKS[timing]
+        self.time_scale = time_scale
+        # time charged for each move, after scaling
+        self.move_times: list[float] = []
+        # color toggled by the last tick, None if nothing changed
+        self.last_toggle: int | None = None
+        self.prepare_time = prepare_time
+        self.prepared = False
+        # time the prepare phase took, after scaling
+        self.time_preparing = 0.0
 
-    def tick(self) -> tuple[Status, str]:
+    def racer_view(self) -> RaceTrack:
+        """The copy of the track the racer gets, with any button under it pressed."""
         track_copy = deepcopy(self.track)
         if track_copy.buttons[self.pos]:
             track_copy.toggle(self.track.button_colors[self.pos])
-        start_time = monotonic()
+        return track_copy
+
+    def prepare(self) -> tuple[Status, str]:
+        """
+        Run the racer's reset and prepare phase, if it has one.
+        Called automatically before the first move.
+        """
+        self.prepared = True
+        if not isinstance(self.player, PreparedPlayer):
+            return Status.ONGOING, "Just Started."
+        start_time = self.clock()
+        try:
+            self.player.reset()
+            self.player.prepare(self.racer_view())
+        except Exception as e:
+            return (
+                Status.DNF,
+                f"Racer crashed while preparing with the following error message:\n{traceback.format_exc()}",
+            )
+        self.time_preparing = (self.clock() - start_time) * self.time_scale
+        if self.prepare_time is not None and self.time_preparing > self.prepare_time:
+            return Status.DNF, "Timed Out while preparing"
+        return Status.ONGOING, "Just Started."
+
+    def tick(self) -> tuple[Status, str]:
+        self.last_toggle = None
+        if not self.prepared:
+            status, msg = self.prepare()
+            if status != Status.ONGOING:
+                return status, msg
+        track_copy = self.racer_view()
+        start_time = self.clock()
         try:
             action = self.player(self.pos, track_copy)
         except Exception as e:
@@ -70,25 +209,27 @@ class Game:
                 Status.DNF,
                 f"Racer crashed with the following error message:\n{traceback.format_exc()}",
             )
-        time_taken = monotonic() - start_time
+        time_taken = (self.clock() - start_time) * self.time_scale
+        self.move_times.append(time_taken)
         self.time -= time_taken
         self.history.append(action)
         if self.time < 0:
-            return Status.DNF, "Timed Out"
+            return Status.DNF, TIMED_OUT
         self.time += min(time_taken, self.delay)
         options = {(1, 0), (-1, 0), (0, 1), (0, -1)}
         if action not in options:
-            return Status.DNF, f"Racer made illegal move {action}!"
+            return Status.DNF, illegal_move_message(action)
         if self.track.buttons[self.pos]:
             self.track.toggle(self.track.button_colors[self.pos])
+            self.last_toggle = int(self.track.button_colors[self.pos])
         self.pos = (self.pos[0] + action[0], self.pos[1] + action[1])
         if not (
             self.pos[0] in range(self.track.shape[0])
             and self.pos[1] in range(self.track.shape[1])
         ):
-            return Status.DNF, "Racer went out of bounds!"
-        if not self.pos in self.track.find_traversable_cells():
-            return Status.DNF, "Racer crashed into a wall!"
+            return Status.DNF, OUT_OF_BOUNDS
+        if not self.track.is_traversable(self.pos):
+            return Status.DNF, CRASHED_INTO_WALL
         new_dist = manhattan_dist(self.pos, self.track.target)
         if new_dist < self.min_dist:
             self.min_dist = new_dist
@@ -96,15 +237,9 @@ class Game:
         else:
             self.turns_without_progress += 1
             if self.turns_without_progress >= self.max_turns_without_progress:
-                return (
-                    Status.DNF,
-                    f"Racer spent {self.turns_without_progress} ticks dawdling!",
-                )
+                return Status.DNF, dawdling_message(self.turns_without_progress)
         if self.pos == self.track.target:
-            return (
-                Status.FINISH,
-                f"Racer made it to the finish line in {len(self.history)} steps!",
-            )
+            return Status.FINISH, finish_message(len(self.history))
         return Status.ONGOING, "Still racing."
 
     def play_game(self) -> tuple[Status, str]:
@@ -127,6 +262,17 @@ def interpolate(start: Point, end: Point, p: float) -> tuple[float, float]:
     return (start[0] * (1 - p) + end[0] * p, start[1] * (1 - p) + end[1] * p)
 
 
+def draw_racer(
+    surface: pygame.Surface,
+    location: tuple[float, float],
+    cell_w: float,
+    cell_h: float,
+) -> None:
+    x, y = (location[1] + 0.5) * cell_w, (location[0] + 0.5) * cell_h
+    pygame.draw.circle(surface, "#000000", (x, y), 0.2 * min(cell_w, cell_h))
+    pygame.draw.circle(surface, "#FFFFFF", (x, y), 0.2 * min(cell_w, cell_h), 2)
+
+
 def watch_replay(track: RaceTrack, history: list[Point], time_per_move: float):
     cell_w = track.screen_size[0] / track.shape[1]
     cell_h = track.screen_size[1] / track.shape[0]
@@ -147,20 +293,20 @@ def watch_replay(track: RaceTrack, history: list[Point], time_per_move: float):
     while True:
 
         p = min(p + dt / time_per_move, 1)
-        track_surface = game.track.render()
         if p >= 1:
             if done:
                 break
             status, _ = game.tick()
             if status != Status.ONGOING:
                 done = True
+            # the track only looks different after a button toggled something
+            if game.last_toggle is not None:
+                track_surface = game.track.render()
             move_start, move_end = move_end, game.pos
             p = 0
         player_location = interpolate(move_start, move_end, p)
-        x, y = (player_location[1] + 0.5) * cell_w, (player_location[0] + 0.5) * cell_h
         screen.blit(track_surface, (0, 0))
-        pygame.draw.circle(screen, "#000000", (x, y), 0.2 * min(cell_w, cell_h))
-        pygame.draw.circle(screen, "#FFFFFF", (x, y), 0.2 * min(cell_w, cell_h), 2)
+        draw_racer(screen, player_location, cell_w, cell_h)
 
         for event in pygame.event.get():
             if event.type == pygame.locals.QUIT:
@@ -172,7 +318,17 @@ def watch_replay(track: RaceTrack, history: list[Point], time_per_move: float):
 
 
 def main():
-    game = Game(PLAYER, TRACK, CLOCK, DELAY, MAX_TURNS_WITHOUT_PROGRESS)
+    time_scale = calibrate() if CALIBRATE else 1.0
+    game = Game(
+        PLAYER,
+        TRACK,
+        CLOCK,
+        DELAY,
+        MAX_TURNS_WITHOUT_PROGRESS,
+        TIMING,
+        time_scale,
+        PREPARE_TIME,
+    )
     _, msg = game.play_game()
     if SHOW_REPLAY:
         watch_replay(TRACK, game.history, REPLAY_SPEED)
@@ -0,0 +1,203 @@
+from collections import deque
+from dataclasses import asdict, dataclass
+import json
+import os
+
+import numpy as np
+
+from game_world.racetrack import RaceTrack, load_track
+from game_world.state_space import ToggleModel
+
+Point = tuple[int, int]
+
+
+@dataclass(frozen=True)
+class TrackAnalysis:
+    """
+    Summary of everything a racer could possibly do on a track.
+
+    Attributes:
+        fingerprint (str): Content hash of the analysed track.
+        solvable (bool): Whether the target can be reached at all.
+        optimal_steps (int | None): Fewest moves to the target, None if unsolvable.
+        reachable_cells (int): Number of cells the racer can stand on in some toggle state.
+        reachable_buttons (tuple[Point, ...]): Buttons the racer can step on.
+        unreachable_buttons (tuple[Point, ...]): Buttons that can never be pressed.
+        reachable_colors (tuple[int, ...]): Colors whose walls can be toggled by a reachable button.
+        relevant_colors (tuple[int, ...]): Reachable colors with walls touching the reachable region,
+            i.e. the toggles that can actually change where the racer may go.
+        toggle_states (tuple[tuple[int, ...], ...]): Every reachable toggle state, given as the
+            colors flipped relative to the track as saved.
+        problems (tuple[str, ...]): Human readable issues found with the track.
+    """
+
+    fingerprint: str
+    solvable: bool
+    optimal_steps: int | None
+    reachable_cells: int
+    reachable_buttons: tuple[Point, ...]
+    unreachable_buttons: tuple[Point, ...]
+    reachable_colors: tuple[int, ...]
+    relevant_colors: tuple[int, ...]
+    toggle_states: tuple[tuple[int, ...], ...]
+    problems: tuple[str, ...]
+
+    @property
+    def ok(self) -> bool:
+        return not self.problems
+
+    def to_dict(self) -> dict:
+        return asdict(self)
+
+    @classmethod
+    def from_dict(cls, data: dict) -> "TrackAnalysis":
+        return cls(
+            fingerprint=data["fingerprint"],
+            solvable=data["solvable"],
+            optimal_steps=data["optimal_steps"],
+            reachable_cells=data["reachable_cells"],
+            reachable_buttons=tuple(tuple(p) for p in data["reachable_buttons"]),
+            unreachable_buttons=tuple(tuple(p) for p in data["unreachable_buttons"]),
+            reachable_colors=tuple(data["reachable_colors"]),
+            relevant_colors=tuple(data["relevant_colors"]),
+            toggle_states=tuple(tuple(s) for s in data["toggle_states"]),
+            problems=tuple(data["problems"]),
+        )
+
+
+_CACHE: dict[str, TrackAnalysis] = {}
+
+
+def explore(model: ToggleModel) -> tuple[dict[tuple[int, int], int], int | None]:
+    """
+    Breadth first search over (cell, toggle state) from spawn.
+    The search does not stop at the target so the whole reachable space gets reported.
+
+    Returns:
+        tuple[dict[tuple[int, int], int], int | None]: Distance to every reachable
+            (cell, mask) pair, and the fewest steps to the target (None if unreachable).
+    """
+    start = (model.spawn, model.start_mask)
+    dist = {start: 0}
+    optimal = 0 if model.spawn == model.target else None
+    queue = deque([start])
+    while queue:
+        state = queue.popleft()
+        cell, mask = state
+        if cell == model.target:
+            # the race ends on the target, nothing is reachable through it
+            continue
+        d = dist[state] + 1
+        for nxt in model.successors(cell, mask):
+            if nxt not in dist:
+                dist[nxt] = d
+                if nxt[0] == model.target and optimal is None:
+                    optimal = d
+                queue.append(nxt)
+    return dist, optimal
+
+
+def analyze_track(track: RaceTrack, use_cache: bool = True) -> TrackAnalysis:
+    """
+    Run a single reachability pass over the track and report on it.
+
+    Args:
+        track (RaceTrack): The track to analyse, in the state a race would start from.
+        use_cache (bool, optional): Reuse an earlier result for identical content. Defaults to True.
+
+    Returns:
+        TrackAnalysis: The analysis.
+    """
+    fingerprint = track.fingerprint
+    if use_cache and fingerprint in _CACHE:
+        return _CACHE[fingerprint]
+
+    model = ToggleModel(track)
+    problems: list[str] = []
+    if not model.open_cells(0)[model.spawn]:
+        problems.append(f"Spawn {track.spawn} is inside an active wall.")
+    # the race never checks spawn itself, so the racer can still step off it
+    dist, optimal = explore(model)
+
+    reached = np.zeros(model.size, dtype=bool)
+    masks: set[int] = set()
+    for cell, mask in dist:
+        reached[cell] = True
+        masks.add(mask)
+
+    reachable_buttons = []
+    unreachable_buttons = []
+    for index in np.flatnonzero(model.buttons):
+        point = model.point(index)
+        (reachable_buttons if reached[index] else unreachable_buttons).append(point)
+    reachable_colors = sorted(
+        {int(model.button_colors[model.index(p)]) for p in reachable_buttons}
+        & set(model.colors)
+    )
+
+    # a toggle only matters if its walls are inside or right next to where we can go
+    touched = reached.copy()
+    for index in np.flatnonzero(reached):
+        touched[list(model.neighbors[index])] = True
+    relevant_colors = [
+        color
+        for color in reachable_colors
+        if np.any(touched & ((model.wall_bit & model.bit[color]) != 0))
+    ]
+
+    if optimal is None:
+        problems.append(f"Target {track.target} cannot be reached from {track.spawn}.")
+    for point in unreachable_buttons:
+        problems.append(f"Button at {point} can never be pressed.")
+
+    analysis = TrackAnalysis(
+        fingerprint=fingerprint,
+        solvable=optimal is not None,
+        optimal_steps=optimal,
+        reachable_cells=int(reached.sum()),
+        reachable_buttons=tuple(reachable_buttons),
+        unreachable_buttons=tuple(unreachable_buttons),
+        reachable_colors=tuple(reachable_colors),
+        relevant_colors=tuple(relevant_colors),
+        toggle_states=tuple(sorted(model.mask_colors(m) for m in masks)),
+        problems=tuple(problems),
+    )
+    _CACHE[fingerprint] = analysis
+    return analysis
+
+
+def load_cache(filename: str) -> None:
+    """Seed the in-process cache from a JSON file written by `save_cache`."""
+    if not os.path.exists(filename):
+        return
+    with open(filename) as f:
+        data = json.load(f)
+    for fingerprint, entry in data.items():
+        _CACHE.setdefault(fingerprint, TrackAnalysis.from_dict(entry))
+
+
+def save_cache(filename: str) -> None:
+    with open(filename, "w") as f:
+        json.dump({k: v.to_dict() for k, v in _CACHE.items()}, f)
+
+
+def validate_tracks(
+    filenames: list[str], cache_file: str | None = None
+) -> dict[str, TrackAnalysis]:
+    """
+    Analyse many track files at once, e.g. at tournament startup.
+
+    Args:
+        filenames (list[str]): Track files to check.
+        cache_file (str | None, optional): JSON file holding results from earlier runs,
+            keyed by fingerprint. Updated with any new results. Defaults to None.
+
+    Returns:
+        dict[str, TrackAnalysis]: The analysis for each file name.
+    """
+    if cache_file:
+        load_cache(cache_file)
+    results = {name: analyze_track(load_track(name)) for name in filenames}
+    if cache_file:
+        save_cache(cache_file)
+    return results
@@ -0,0 +1,121 @@
+import numpy as np
+
+from game_world.state_space import MOVES, ToggleModel
+
+
+class ArraySearch:
+    """
+    Breadth first search over (cell, toggle state) on flat integer state ids.
+
+    A state id is `cell * n_states + state`. Distances and parents live in arrays
+    preallocated for every possible id, so no per-node tuples or dicts are created and
+    peak memory is known up front (see `memory_bytes`). All edges cost one step, so a
+    bucket queue keyed on distance only ever holds one bucket: the current layer.
+    Each layer is expanded in one vectorised pass. A state is closed as soon as its
+    distance is set, because in a unit cost search the first visit is the shortest.
+
+    Only the toggle bits some button can actually flip are kept, packed into the
+    low bits, so a pruned model gives a correspondingly smaller state space.
+
+    The vectorised passes have a fixed cost per layer, so this only pays off on big
+    state spaces: on every bundled track (extreme.pkl's 32k states included) it is
+    slower than `forward_search`, and it wins from around 100k states on (see
+    `benchmarks/array_search.py`).
+    """
+
+    def __init__(self, model: ToggleModel) -> None:
+        self.model = model
+        rows, cols = model.shape
+        used = int(np.bitwise_or.reduce(model.button_bit)) if model.size else 0
+        old_bits = [1 << i for i in range(len(model.colors)) if used & (1 << i)]
+        self.n_states = 1 << len(old_bits)
+
+        def pack(bits: np.ndarray) -> np.ndarray:
+            packed = np.zeros(model.size, dtype=np.int64)
+            for new, old in enumerate(old_bits):
+                packed |= ((bits & old) != 0).astype(np.int64) << new
+            return packed
+
+        self.wall_bit = pack(model.wall_bit)
+        self.button_bit = pack(model.button_bit)
+        self.start_mask = int(pack(np.full(model.size, model.start_mask))[0])
+
+        # neighbor table, -1 where a move leaves the grid
+        index = np.arange(model.size).reshape(rows, cols)
+        self.neighbors = np.full((model.size, len(MOVES)), -1, dtype=np.int64)
+        for k, (dr, dc) in enumerate(MOVES):
+            shifted = np.full((rows, cols), -1, dtype=np.int64)
+            shifted[
+                max(0, -dr) : rows - max(0, dr), max(0, -dc) : cols - max(0, dc)
+            ] = index[max(0, dr) : rows + min(0, dr), max(0, dc) : cols + min(0, dc)]
+            self.neighbors[:, k] = shifted.ravel()
+
+        n_ids = model.size * self.n_states
+        self.id_dtype = np.int32 if n_ids < 2**31 else np.int64
+        self.g = np.empty(n_ids, dtype=np.int32)
+        self.parent = np.empty(n_ids, dtype=self.id_dtype)
+
+    @property
+    def memory_bytes(self) -> int:
+        """Bytes held by the per-state arrays, independent of how much gets explored."""
+        return self.g.nbytes + self.parent.nbytes + self.neighbors.nbytes
+
+    def successors(self, ids: np.ndarray) -> np.ndarray:
+        """
+        Successor ids of a batch of state ids.
+
+        Returns:
+            np.ndarray: One row per id and one column per move, -1 where the move is illegal.
+        """
+        n = self.n_states
+        cells, masks = ids // n, ids % n
+        nbrs = self.neighbors[cells]
+        safe = np.where(nbrs >= 0, nbrs, 0)
+        flipped = (self.wall_bit[safe] & masks[:, None]) != 0
+        # a wall is open when flipping it cancels out its active flag
+        walkable = (~self.model.walls[safe] | (self.model.active[safe] == flipped)) & (
+            nbrs >= 0
+        )
+        succ = safe * n + (masks[:, None] ^ self.button_bit[safe])
+        return np.where(walkable, succ, -1)
+
+    def search(self) -> tuple[list[int], int]:
+        """
+        Returns:
+            tuple[list[int], int]: Flat cells visited after spawn (empty if unsolvable),
+                and the number of states expanded.
+        """
+        model, n = self.model, self.n_states
+        g, parent = self.g, self.parent
+        g.fill(-1)
+        start = model.spawn * n + self.start_mask
+        g[start] = 0
+        parent[start] = -1
+        layer = np.array([start], dtype=np.int64)
+        depth = 0
+        expanded = 0
+        while layer.size:
+            cells = layer // n
+            at_target = cells == model.target
+            if at_target.any():
+                return self._path(int(layer[np.argmax(at_target)])), expanded
+            expanded += layer.size
+            depth += 1
+            succ = self.successors(layer)
+            walkable = succ >= 0
+            src = np.broadcast_to(layer[:, None], succ.shape)[walkable]
+            ids = succ[walkable]
+            fresh = g[ids] < 0
+            ids, src = ids[fresh], src[fresh]
+            ids, first = np.unique(ids, return_index=True)
+            g[ids] = depth
+            parent[ids] = src[first]
+            layer = ids
+        return [], expanded
+
+    def _path(self, state: int) -> list[int]:
+        cells = []
+        while self.parent[state] >= 0:
+            cells.append(state // self.n_states)
+            state = int(self.parent[state])
+        return cells[::-1]
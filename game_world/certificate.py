@@ -0,0 +1,155 @@
+import base64
+from dataclasses import dataclass
+import zlib
+
+import numpy as np
+
+from game_world.array_search import ArraySearch
+from game_world.pruning import prune
+from game_world.racetrack import RaceTrack
+from game_world.state_space import ToggleModel
+
+UNREACHABLE = -1
+
+
+@dataclass(frozen=True)
+class Certificate:
+    """
+    Proof that a track's optimal step count is what the solver says it is.
+
+    `distances` gives the exact number of steps from every (cell, toggle state) to the
+    target, indexed by the state ids of `ArraySearch` on the pruned model of the track.
+    Anyone holding the track can check it with one vectorised pass over all edges (see
+    `check_certificate`), which is far cheaper than trusting or rerunning a search.
+
+    Attributes:
+        fingerprint (str): Content hash of the certified track.
+        optimal_steps (int | None): Fewest moves from spawn to the target, None if unsolvable.
+        n_states (int): Toggle states per cell in the state ids.
+        distances (np.ndarray): Steps to the target for every state id, UNREACHABLE if
+            the target can't be reached from it.
+    """
+
+    fingerprint: str
+    optimal_steps: int | None
+    n_states: int
+    distances: np.ndarray
+
+    def to_dict(self) -> dict:
+        raw = self.distances.astype("<i4").tobytes()
+        return {
+            "fingerprint": self.fingerprint,
+            "optimal_steps": self.optimal_steps,
+            "n_states": self.n_states,
+            "distances": base64.b64encode(zlib.compress(raw, 9)).decode(),
+        }
+
+    @classmethod
+    def from_dict(cls, data: dict) -> "Certificate":
+        raw = zlib.decompress(base64.b64decode(data["distances"]))
+        return cls(
+            fingerprint=data["fingerprint"],
+            optimal_steps=data["optimal_steps"],
+            n_states=data["n_states"],
+            distances=np.frombuffer(raw, dtype="<i4").astype(np.int32),
+        )
+
+
+def _engine(track: RaceTrack) -> ArraySearch:
+    return ArraySearch(prune(ToggleModel(track)))
+
+
+def certify(track: RaceTrack) -> Certificate:
+    """
+    Solve a track backwards: one breadth first search from every target state along
+    reversed edges gives the distance to the target from every state at once.
+
+    Args:
+        track (RaceTrack): The track, in the state a race starts from.
+
+    Returns:
+        Certificate: The distance field and the optimal step count it implies.
+    """
+    engine = _engine(track)
+    model, n = engine.model, engine.n_states
+    n_ids = model.size * n
+    ids = np.arange(n_ids, dtype=np.int64)
+    succ = engine.successors(ids)
+    # the race ends on the target, so nothing leads on from there
+    succ[ids // n == model.target] = -1
+
+    # reversed edges in CSR form: the predecessors of id d are pred[start[d]:start[d + 1]]
+    walkable = succ >= 0
+    dst = succ[walkable]
+    order = np.argsort(dst, kind="stable")
+    pred = np.broadcast_to(ids[:, None], succ.shape)[walkable][order]
+    start = np.searchsorted(dst[order], np.arange(n_ids + 1))
+
+    distances = np.full(n_ids, UNREACHABLE, dtype=np.int32)
+    layer = model.target * n + np.arange(n, dtype=np.int64)
+    distances[layer] = 0
+    depth = 0
+    while layer.size:
+        depth += 1
+        lo, counts = start[layer], start[layer + 1] - start[layer]
+        offsets = np.repeat(lo - (np.cumsum(counts) - counts), counts)
+        found = pred[np.arange(counts.sum()) + offsets]
+        layer = np.unique(found[distances[found] == UNREACHABLE])
+        distances[layer] = depth
+
+    spawn = int(distances[model.spawn * n + engine.start_mask])
+    return Certificate(
+        fingerprint=track.fingerprint,
+        optimal_steps=None if spawn == UNREACHABLE else spawn,
+        n_states=n,
+        distances=distances,
+    )
+
+
+def check_certificate(track: RaceTrack, certificate: Certificate) -> list[str]:
+    """
+    Check a certificate against a track without searching.
+
+    Every target state must be at distance 0, and along every legal move the distance
+    drops by at most one, so no path can beat the claimed count. Every other reachable
+    state must also have a move that drops it by exactly one, so the count is achieved.
+    Together those make spawn's distance the true optimum.
+
+    Returns:
+        list[str]: Everything wrong with the certificate, empty if it holds.
+    """
+    if certificate.fingerprint != track.fingerprint:
+        return ["Certificate is for a different track."]
+    engine = _engine(track)
+    model, n = engine.model, engine.n_states
+    n_ids = model.size * n
+    if certificate.n_states != n or certificate.distances.shape != (n_ids,):
+        return ["Certificate doesn't match the track's state space."]
+
+    # an unreachable state is worse than any finite distance
+    infinity = n_ids + 1
+    dist = np.where(
+        certificate.distances == UNREACHABLE, infinity, certificate.distances
+    ).astype(np.int64)
+    ids = np.arange(n_ids, dtype=np.int64)
+    succ = engine.successors(ids)
+    succ_dist = np.where(succ >= 0, dist[np.where(succ >= 0, succ, 0)], infinity)
+    best = succ_dist.min(axis=1)
+    at_target = ids // n == model.target
+
+    problems = []
+    if (dist[at_target] != 0).any():
+        problems.append("Target states must be at distance 0.")
+    away = ~at_target
+    if (dist[away] > best[away] + 1).any():
+        problems.append("Some move gains more than one step on the claimed distance.")
+    finite = away & (dist < infinity)
+    if (dist[finite] != best[finite] + 1).any():
+        problems.append("Some distance has no move that achieves it.")
+    spawn = int(dist[model.spawn * n + engine.start_mask])
+    claimed = certificate.optimal_steps
+    if (claimed is None) != (spawn == infinity) or (
+        claimed is not None and claimed != spawn
+    ):
+        problems.append(f"Spawn is at distance {spawn}, not {claimed}.")
+    return problems
@@ -0,0 +1,161 @@
+import heapq
+
+import numpy as np
+
+from game_world.state_space import ToggleModel
+
+# node -> [(next node, cells walked to get there, ending with the next node)]
+MacroEdges = dict[int, list[tuple[int, tuple[int, ...]]]]
+
+
+class CorridorGraph:
+    """
+    Contracted version of a track's grid, built lazily per toggle state.
+
+    Inside one toggle state a cell with exactly two open neighbors can only be walked
+    straight through, so chains of them collapse into one weighted macro-edge between
+    "mandatory" nodes. Mandatory nodes are junctions, spawn, target and buttons. Dead
+    ends that hold nothing mandatory are dropped entirely since entering them can
+    never help.
+
+    Turning back inside a corridor only leads somewhere already visited in the same
+    toggle state, unless it steps back onto a button to press it again. That case is
+    a two step macro-edge from each open button onto a neighbor and back, so the
+    neighbors themselves don't have to be nodes.
+
+    A button can close its own cell while the racer stands on it, and spawn can start
+    out closed the same way, so those cells get out-edges even when they are walls.
+    A closed cell isn't part of the open grid, so the cells next to it are made nodes
+    in that toggle state: the racer may turn either way after stepping off, and a
+    corridor that only leads back to it must not be peeled off as a dead end.
+    """
+
+    def __init__(self, model: ToggleModel) -> None:
+        self.model = model
+        standing = model.button_bit != 0
+        standing[model.spawn] = True
+        # cells the racer can stand on while they are closed
+        self.standing = standing
+        self.keep = standing.copy()
+        self.keep[model.target] = True
+        self._graphs: dict[int, MacroEdges] = {}
+
+    def _next_to(self, cells: np.ndarray) -> np.ndarray:
+        """Flat mask of the cells with a neighbor in `cells`."""
+        grid = cells.reshape(self.model.shape)
+        near = np.zeros_like(grid)
+        near[1:, :] |= grid[:-1, :]
+        near[:-1, :] |= grid[1:, :]
+        near[:, 1:] |= grid[:, :-1]
+        near[:, :-1] |= grid[:, 1:]
+        return near.ravel()
+
+    def _degree(self, open_cells: np.ndarray) -> np.ndarray:
+        grid = open_cells.reshape(self.model.shape).astype(np.int8)
+        degree = np.zeros_like(grid)
+        degree[1:, :] += grid[:-1, :]
+        degree[:-1, :] += grid[1:, :]
+        degree[:, 1:] += grid[:, :-1]
+        degree[:, :-1] += grid[:, 1:]
+        return degree.ravel()
+
+    def edges(self, mask: int) -> MacroEdges:
+        """The macro-edges between mandatory nodes in one toggle state."""
+        graph = self._graphs.get(mask)
+        if graph is not None:
+            return graph
+        model = self.model
+        all_open = model.open_cells(mask)
+        open_cells = all_open.copy()
+        keep = self.keep | self._next_to(self.standing & ~all_open)
+        # peel dead ends until none are left
+        while True:
+            degree = self._degree(open_cells)
+            dead = open_cells & (degree <= 1) & ~keep
+            if not dead.any():
+                break
+            open_cells &= ~dead
+        degree = self._degree(open_cells)
+        nodes = open_cells & ((degree != 2) | keep)
+
+        graph = {}
+        for node in np.flatnonzero(nodes | self.standing).tolist():
+            out = []
+            for first in model.neighbors[node]:
+                if not open_cells[first]:
+                    continue
+                prev, cur, cells = node, first, [first]
+                while not nodes[cur]:
+                    prev, cur = cur, next(
+                        n for n in model.neighbors[cur] if open_cells[n] and n != prev
+                    )
+                    cells.append(cur)
+                # a loop back to where we started only matters if it presses a button
+                if cur == node and not model.button_bit[node]:
+                    continue
+                out.append((cur, tuple(cells)))
+            if model.button_bit[node] and all_open[node]:
+                # step off and straight back on to press the button again, through
+                # any open neighbor that isn't a node already (dead ends included)
+                out.extend(
+                    (node, (n, node))
+                    for n in model.neighbors[node]
+                    if all_open[n] and not nodes[n]
+                )
+            graph[node] = out
+        self._graphs[mask] = graph
+        return graph
+
+    def node_count(self, mask: int) -> int:
+        """
+        Nodes the racer can stand on in one toggle state: the open ones, plus spawn.
+        Closed buttons keep their out-edges but aren't counted.
+        """
+        open_cells = self.model.open_cells(mask)
+        return sum(
+            1
+            for node in self.edges(mask)
+            if open_cells[node] or node == self.model.spawn
+        )
+
+    def search(self) -> tuple[list[int], int]:
+        """
+        A* over (node, toggle state) on the contracted graph.
+
+        Returns:
+            tuple[list[int], int]: The unit-step flat cells visited after spawn
+                (empty if unsolvable), and the number of states expanded.
+        """
+        model = self.model
+        rows, cols = model.shape
+        target_row, target_col = divmod(model.target, cols)
+
+        def h(cell: int) -> int:
+            row, col = divmod(cell, cols)
+            return abs(row - target_row) + abs(col - target_col)
+
+        start = (model.spawn, model.start_mask)
+        g_scores = {start: 0}
+        camefrom: dict[tuple[int, int], tuple[tuple[int, int], tuple[int, ...]]] = {}
+        frontier = [(h(model.spawn), 0, start)]
+        expanded = 0
+        while frontier:
+            _, g, state = heapq.heappop(frontier)
+            if g > g_scores[state]:
+                continue
+            node, mask = state
+            if node == model.target:
+                cells: list[int] = []
+                while state != start:
+                    state, walked = camefrom[state]
+                    cells[:0] = walked
+                return cells, expanded
+            expanded += 1
+            for nxt_node, walked in self.edges(mask).get(node, ()):
+                nxt = (nxt_node, mask ^ int(model.button_bit[nxt_node]))
+                new_g = g + len(walked)
+                if nxt not in g_scores or new_g < g_scores[nxt]:
+                    g_scores[nxt] = new_g
+                    camefrom[nxt] = (state, walked)
+                    heapq.heappush(frontier, (new_g + h(nxt_node), new_g, nxt))
+        return [], expanded
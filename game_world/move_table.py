@@ -0,0 +1,30 @@
+import numpy as np
+
+Point = tuple[int, int]
+
+# bit i of a move table entry is set when DIRECTIONS[i] is a legal move
+DIRECTIONS: tuple[Point, ...] = ((-1, 0), (1, 0), (0, -1), (0, 1))
+
+# the legal moves for every possible entry, in DIRECTIONS order
+LEGAL_MOVES: tuple[tuple[Point, ...], ...] = tuple(
+    tuple(d for i, d in enumerate(DIRECTIONS) if bits & (1 << i)) for bits in range(16)
+)
+
+
+def build_move_table(traversable: np.ndarray) -> np.ndarray:
+    """
+    Bitmask of legal moves for every cell of a grid.
+
+    Args:
+        traversable (np.ndarray): Boolean grid of cells a racer may move onto.
+
+    Returns:
+        np.ndarray: uint8 grid of the same shape, bit i set when DIRECTIONS[i] leads
+            to a traversable cell inside the grid.
+    """
+    table = np.zeros(traversable.shape, dtype=np.uint8)
+    table[1:, :] |= traversable[:-1, :].astype(np.uint8)  # up
+    table[:-1, :] |= traversable[1:, :].astype(np.uint8) << 1  # down
+    table[:, 1:] |= traversable[:, :-1].astype(np.uint8) << 2  # left
+    table[:, :-1] |= traversable[:, 1:].astype(np.uint8) << 3  # right
+    return table
@@ -0,0 +1,107 @@
+from collections import deque
+from copy import copy
+from dataclasses import dataclass
+
+import numpy as np
+
+from game_world.analysis import explore
+from game_world.racetrack import RaceTrack
+from game_world.state_space import ToggleModel
+
+
+def reachable_region(model: ToggleModel) -> tuple[np.ndarray, tuple[int, ...]]:
+    """
+    Over-approximate where the racer can ever stand, ignoring the order of presses.
+
+    Any color with a reachable button is assumed to be switchable at will, so its walls
+    count as open. This is repeated until no new buttons turn up. Every cell reachable
+    in the real game is inside the region, so pruning against it is safe.
+
+    Returns:
+        tuple[np.ndarray, tuple[int, ...]]: Flat boolean array of the region and the
+            colors that have a button inside it.
+    """
+    switchable = 0
+    while True:
+        # walls of switchable colors are open in one of the two states
+        passable = model.open_cells(0) | ((model.wall_bit & switchable) != 0)
+        region = np.zeros(model.size, dtype=bool)
+        region[model.spawn] = True
+        queue = deque([model.spawn])
+        while queue:
+            cell = queue.popleft()
+            if cell == model.target:
+                continue
+            for n in model.neighbors[cell]:
+                if passable[n] and not region[n]:
+                    region[n] = True
+                    queue.append(n)
+        pressable = int(np.bitwise_or.reduce(model.button_bit[region]))
+        if pressable == switchable:
+            return region, model.mask_colors(switchable)
+        switchable = pressable
+
+
+def relevant_colors(model: ToggleModel) -> tuple[int, ...]:
+    """
+    Colors whose toggling can change what the racer is allowed to do.
+    A color is relevant if one of its buttons and one of its walls are both in the
+    reachable region. Pressing any other color never changes a legal move.
+    """
+    region, pressable = reachable_region(model)
+    return tuple(
+        color
+        for color in pressable
+        if np.any(region & ((model.wall_bit & model.bit[color]) != 0))
+    )
+
+
+def prune(model: ToggleModel) -> ToggleModel:
+    """
+    Return a copy of the model with irrelevant toggle bits collapsed.
+    Buttons of irrelevant colors behave like plain floor, so states that only differ
+    in those bits become the same state.
+    """
+    keep = sum(model.bit[color] for color in relevant_colors(model))
+    pruned = copy(model)
+    pruned.button_bit = model.button_bit & keep
+    pruned.start_mask = model.start_mask & keep
+    return pruned
+
+
+@dataclass(frozen=True)
+class PruningReport:
+    """
+    State counts before and after pruning.
+
+    Attributes:
+        colors (int): Wall colors on the track (each one a toggle bit).
+        relevant_colors (tuple[int, ...]): Colors kept after pruning.
+        nominal_states (int): Cells times every possible toggle state.
+        pruned_states (int): Cells in the reachable region times the relevant toggle states.
+        reachable_states (int): (cell, state) pairs actually reached by the pruned search.
+    """
+
+    colors: int
+    relevant_colors: tuple[int, ...]
+    nominal_states: int
+    pruned_states: int
+    reachable_states: int
+
+    @property
+    def reduction_factor(self) -> float:
+        return self.nominal_states / max(self.pruned_states, 1)
+
+
+def pruning_report(track: RaceTrack) -> PruningReport:
+    model = ToggleModel(track)
+    region, _ = reachable_region(model)
+    relevant = relevant_colors(model)
+    dist, _ = explore(prune(model))
+    return PruningReport(
+        colors=len(model.colors),
+        relevant_colors=relevant,
+        nominal_states=model.size * model.n_states,
+        pruned_states=int(region.sum()) << len(relevant),
+        reachable_states=len(dist),
+    )
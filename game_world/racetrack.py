@@ -1,11 +1,44 @@
 from copy import deepcopy
+import hashlib
 from itertools import product
+import os
 import pickle
+from typing import TYPE_CHECKING
 import pygame
 import numpy as np
 
+from game_world.move_table import build_move_table
+
+if TYPE_CHECKING:
+    from game_world.analysis import TrackAnalysis
+
 Point = tuple[int, int]
 
+# (path, modification time, size) -> track as loaded, handed out as copies
+_LOADED_TRACKS: dict[tuple[str, int, int], "RaceTrack"] = {}
+
+LAYER_NAMES = ("walls", "active", "buttons", "wall_colors", "button_colors")
+# the globals a saved track may reference, enough to rebuild numpy arrays and scalars
+SAFE_GLOBALS = {
+    ("numpy", "ndarray"),
+    ("numpy", "dtype"),
+    ("numpy._core.multiarray", "_reconstruct"),
+    ("numpy._core.multiarray", "scalar"),
+    ("numpy.core.multiarray", "_reconstruct"),
+    ("numpy.core.multiarray", "scalar"),
+}
+
+COLORS = {
+    0: "#ffffff",
+    1: "#000000",
+    2: "#d20000",
+    3: "#de9f00",
+    4: "#00AE00",
+    5: "#0000cd",
+    6: "#8b008b",
+    7: "#739F9F",
+}
+
 
 class RaceTrack:
 
@@ -34,23 +67,17 @@ class RaceTrack:
         self.wall_colors = wall_colors
         self.button_colors = button_colors
         self.shape = walls.shape
-        colors_basic = {
-            0: "#ffffff",
-            1: "#000000",
-            2: "#d20000",
-            3: "#de9f00",
-            4: "#00AE00",
-            5: "#0000cd",
-            6: "#8b008b",
-            7: "#739F9F",
-        }
-        self.color_scheme = {i: pygame.Color(c) for i, c in colors_basic.items()}
+        self.color_scheme = {i: pygame.Color(c) for i, c in COLORS.items()}
         self.spawn = spawn
         self.target = target
         self.screen_size = screen_size
+        # colors toggled an odd number of times since the layers were handed in
+        self.toggled: frozenset[int] = frozenset()
+        # toggled colors -> (traversable cells, move table), shared with deep copies
+        self._move_tables: dict[frozenset[int], tuple[np.ndarray, np.ndarray]] = {}
 
     def __deepcopy__(self, memo) -> "RaceTrack":
-        return RaceTrack(
+        track = RaceTrack(
             deepcopy(self.walls, memo),
             deepcopy(self.active, memo),
             deepcopy(self.buttons, memo),
@@ -60,6 +87,9 @@ class RaceTrack:
             deepcopy(self.spawn, memo),
             deepcopy(self.screen_size, memo),
         )
+        track.toggled = self.toggled
+        track._move_tables = self._move_tables
+        return track
 
     def render(self) -> pygame.Surface:
         """Draw out the track in its current state"""
@@ -67,45 +97,58 @@ class RaceTrack:
         surface.fill("#ffffff")
         rows, cols = self.shape
         w, h = self.screen_size[0] / cols, self.screen_size[1] / rows
-        star_img = pygame.image.load("star.png")
-        star_img = pygame.transform.scale(star_img, (0.8 * w, 0.8 * h))
-        triangle = pygame.Surface((0.8 * w, 0.8 * w), pygame.SRCALPHA, 32)
-        triangle = triangle.convert_alpha()
-        pygame.draw.polygon(
-            triangle, "#278B00", [(0.4 * w, 0), (0.8 * w, 0.8 * h), (0, 0.8 * h)]
+        draw_cells(
+            surface,
+            (0, 0),
+            (w, h),
+            self.walls,
+            self.active,
+            self.buttons,
+            self.wall_colors,
+            self.button_colors,
+            self.spawn,
+            self.target,
+            self.color_scheme,
         )
-        for row, col in product(range(rows), range(cols)):
-            x, y = col * w, row * h
-            active = self.active[row, col]
-            wall = self.walls[row, col]
-            button = self.buttons[row, col]
-            if wall != 0:
-                wall_color = self.color_scheme[self.wall_colors[row, col]]
-                pygame.draw.rect(
-                    surface,
-                    wall_color,
-                    (x, y, w + 1, h + 1),
-                    0 if active else int(0.2 * min(w, h)),
-                )
-            if (row, col) == self.spawn:
-                surface.blit(triangle, (x + 0.1 * w, y + 0.1 * h))
-            if button:
-                button_color = self.color_scheme[self.button_colors[row, col]]
-                pygame.draw.circle(
-                    surface, button_color, (x + w / 2, y + h / 2), 0.3 * min(w, h)
-                )
-                pygame.draw.circle(
-                    surface,
-                    "#ffffff",
-                    (x + w / 2, y + h / 2),
-                    0.3 * min(w, h),
-                    int(0.05 * min(w, h)),
-                )
-            if (row, col) == self.target:
-                surface.blit(star_img, (x + 0.1 * w, y + 0.1 * h))
-            pygame.draw.rect(surface, "#000000", (x, y, w + 1, h + 1), 2)
         return surface
 
+    def render_region(
+        self, surface: pygame.Surface, top_left: Point, bottom_right: Point
+    ) -> None:
+        """
+        Redraw the cells between two corners (inclusive) on a surface made by `render`,
+        so a small edit doesn't mean drawing the whole track again.
+        """
+        rows, cols = self.shape
+        w, h = self.screen_size[0] / cols, self.screen_size[1] / rows
+        (r0, c0), (r1, c1) = top_left, bottom_right
+        # changed cells plus the pixel their walls overhang into the next cell
+        clip = pygame.Rect(int(c0 * w), int(r0 * h), 0, 0)
+        clip.width = int((c1 + 1) * w) + 1 - clip.x
+        clip.height = int((r1 + 1) * h) + 1 - clip.y
+        # neighbors are drawn too, in case their walls overhang into the clip
+        r0, c0 = max(r0 - 1, 0), max(c0 - 1, 0)
+        r1, c1 = min(r1 + 2, rows), min(c1 + 2, cols)
+        window = (slice(r0, r1), slice(c0, c1))
+        old_clip = surface.get_clip()
+        surface.set_clip(clip)
+        surface.fill("#ffffff")
+        draw_cells(
+            surface,
+            (r0, c0),
+            (w, h),
+            self.walls[window],
+            self.active[window],
+            self.buttons[window],
+            self.wall_colors[window],
+            self.button_colors[window],
+            self.spawn,
+            self.target,
+            self.color_scheme,
+            (c0 * w, r0 * h),
+        )
+        surface.set_clip(old_clip)
+
     def find_wall_locations_np(
         self, color: int | None = None, active: bool | None = None
     ) -> tuple[np.ndarray, np.ndarray]:
@@ -173,16 +216,75 @@ class RaceTrack:
         output = np.where((self.walls == 0).astype(int) | (1 - self.active).astype(int))
         return set(zip(output[0].astype(int), output[1].astype(int)))
 
+    def is_traversable(self, point: Point) -> bool:
+        """
+        Whether your bot can currently stand on a single cell.
+        Same rule as `find_traversable_cells` without building the whole set.
+        """
+        return bool(self.walls[point] == 0 or self.active[point] == 0)
+
+    def move_table(self) -> np.ndarray:
+        """
+        Legal moves from every cell in the track's current state, as a bitmask per cell.
+        See `game_world.move_table` for the bit layout.
+        Tables are cached per toggle state (see `toggled`) and shared with deep copies.
+        A cached table is only used while the cells it was built from are still the
+        traversable ones, so editing the layers of any copy can't leave it stale.
+
+        Returns:
+            np.ndarray: uint8 array the shape of the track.
+        """
+        traversable = (self.walls == 0) | (self.active == 0)
+        cached = self._move_tables.get(self.toggled)
+        if cached is not None and np.array_equal(cached[0], traversable):
+            return cached[1]
+        table = build_move_table(traversable)
+        table.flags.writeable = False
+        self._move_tables[self.toggled] = (traversable, table)
+        return table
+
     def toggle(self, color: int) -> None:
         self.active[self.find_wall_locations_np(color)] = (
             1 - self.active[self.find_wall_locations_np(color)]
         )
+        self.toggled = self.toggled ^ {int(color)}
 
     def get_grid_coord(self, x: float, y: float) -> tuple[int, int]:
         rows, cols = self.shape
         w, h = self.screen_size[0] / cols, self.screen_size[1] / rows
         return int(y / h), int(x / w)
 
+    @property
+    def fingerprint(self) -> str:
+        """
+        Hash of the track's contents (layers, spawn and target).
+        Two tracks with the same fingerprint race identically, whatever file they came from.
+        """
+        digest = hashlib.blake2b(digest_size=16)
+        shape = tuple(int(n) for n in self.shape)
+        target = tuple(int(n) for n in self.target)
+        spawn = tuple(int(n) for n in self.spawn)
+        digest.update(repr((shape, target, spawn)).encode())
+        for layer in (
+            self.walls,
+            self.active,
+            self.buttons,
+            self.wall_colors,
+            self.button_colors,
+        ):
+            # uint8 is what load_track stores, so loaded tracks hash without a copy
+            digest.update(np.ascontiguousarray(layer, dtype=np.uint8).tobytes())
+        return digest.hexdigest()
+
+    def analyze(self, use_cache: bool = True) -> "TrackAnalysis":
+        """
+        Check solvability, optimal step count and reachable buttons for this track.
+        See `game_world.analysis.analyze_track`.
+        """
+        from game_world.analysis import analyze_track
+
+        return analyze_track(self, use_cache)
+
     def save(self, filename: str) -> None:
         save_data = (
             self.walls,
@@ -198,10 +300,176 @@ class RaceTrack:
             pickle.dump(save_data, f)
 
 
-def load_track(filename: str) -> RaceTrack:
-    with open(filename, "rb") as f:
-        data = pickle.load(f)
-    track = RaceTrack(*data)
+def draw_cells(
+    surface: pygame.Surface,
+    origin: Point,
+    cell_size: tuple[float, float],
+    walls: np.ndarray,
+    active: np.ndarray,
+    buttons: np.ndarray,
+    wall_colors: np.ndarray,
+    button_colors: np.ndarray,
+    spawn: Point,
+    target: Point,
+    color_scheme: dict[int, pygame.Color],
+    offset: tuple[float, float] = (0, 0),
+) -> None:
+    """
+    Draw a block of cells onto a surface, with its top left cell at `offset`.
+
+    Args:
+        surface (pygame.Surface): Where to draw.
+        origin (Point): Track coordinates (row, col) of the block's top left cell.
+        cell_size (tuple[float, float]): Width and height of one cell in pixels.
+        walls, active, buttons, wall_colors, button_colors (np.ndarray): The block's layers.
+        spawn (Point): Spawn in track coordinates, drawn if inside the block.
+        target (Point): Target in track coordinates, drawn if inside the block.
+        color_scheme (dict[int, pygame.Color]): Color for each color index.
+        offset (tuple[float, float], optional): Pixel position of the block's top left
+            cell. Defaults to the surface's origin.
+    """
+    w, h = cell_size
+    star_img = pygame.image.load("star.png")
+    star_img = pygame.transform.scale(star_img, (0.8 * w, 0.8 * h))
+    triangle = pygame.Surface((0.8 * w, 0.8 * w), pygame.SRCALPHA, 32)
+    triangle = triangle.convert_alpha()
+    pygame.draw.polygon(
+        triangle, "#278B00", [(0.4 * w, 0), (0.8 * w, 0.8 * h), (0, 0.8 * h)]
+    )
+    rows, cols = walls.shape
+    for row, col in product(range(rows), range(cols)):
+        x, y = offset[0] + col * w, offset[1] + row * h
+        point = (origin[0] + row, origin[1] + col)
+        if walls[row, col] != 0:
+            wall_color = color_scheme[wall_colors[row, col]]
+            pygame.draw.rect(
+                surface,
+                wall_color,
+                (x, y, w + 1, h + 1),
+                0 if active[row, col] else int(0.2 * min(w, h)),
+            )
+        if point == spawn:
+            surface.blit(triangle, (x + 0.1 * w, y + 0.1 * h))
+        if buttons[row, col]:
+            button_color = color_scheme[button_colors[row, col]]
+            pygame.draw.circle(
+                surface, button_color, (x + w / 2, y + h / 2), 0.3 * min(w, h)
+            )
+            pygame.draw.circle(
+                surface,
+                "#ffffff",
+                (x + w / 2, y + h / 2),
+                0.3 * min(w, h),
+                int(0.05 * min(w, h)),
+            )
+        if point == target:
+            surface.blit(star_img, (x + 0.1 * w, y + 0.1 * h))
+        pygame.draw.rect(surface, "#000000", (x, y, w + 1, h + 1), 2)
+
+
+class _TrackUnpickler(pickle.Unpickler):
+    """Unpickler that refuses anything but numpy arrays and plain builtins."""
+
+    def find_class(self, module: str, name: str):
+        if (module, name) not in SAFE_GLOBALS:
+            raise pickle.UnpicklingError(f"Track files may not reference {module}.{name}")
+        return super().find_class(module, name)
+
+
+def _point(value, name: str) -> Point:
+    if not (
+        isinstance(value, (tuple, list))
+        and len(value) == 2
+        and all(isinstance(n, (int, np.integer)) and not isinstance(n, bool) for n in value)
+    ):
+        raise ValueError(f"{name} must be a pair of integers, got {value!r}")
+    return int(value[0]), int(value[1])
+
+
+def validate_track_data(data) -> tuple:
+    """
+    Check the tuple stored in a track file and normalise it.
+
+    Layers must be 2D numeric arrays of one shape holding whole numbers: 0/1 for walls,
+    active and buttons, and a key of `COLORS` for the color layers. Spawn and target
+    must lie on the grid.
+
+    Args:
+        data: Whatever was unpickled from the file.
+
+    Raises:
+        ValueError: If anything is missing, mistyped or out of range.
+
+    Returns:
+        tuple: Arguments for `RaceTrack`, with every layer as uint8 and every point
+            as a tuple of python ints.
+    """
+    if not isinstance(data, (tuple, list)) or len(data) != 8:
+        raise ValueError("A track must be a tuple of 5 layers, target, spawn and screen size")
+    layers = []
+    for name, layer in zip(LAYER_NAMES, data[:5]):
+        if not isinstance(layer, np.ndarray) or layer.ndim != 2:
+            raise ValueError(f"Layer {name} must be a 2D numpy array")
+        if layer.dtype.kind not in "biuf":
+            raise ValueError(f"Layer {name} has non numeric dtype {layer.dtype}")
+        high = 1 if name in ("walls", "active", "buttons") else max(COLORS)
+        if layer.size and (
+            (layer.dtype.kind == "f" and not np.isfinite(layer).all())
+            or layer.min() < 0
+            or layer.max() > high
+            or (layer.dtype.kind == "f" and (layer != np.round(layer)).any())
+        ):
+            raise ValueError(f"Layer {name} must hold whole numbers from 0 to {high}")
+        layers.append(layer.astype(np.uint8))
+    shape = layers[0].shape
+    if any(layer.shape != shape for layer in layers) or 0 in shape:
+        raise ValueError("All map layers must be same, non empty, shape.")
+    target, spawn = _point(data[5], "target"), _point(data[6], "spawn")
+    for name, point in (("target", target), ("spawn", spawn)):
+        if not (0 <= point[0] < shape[0] and 0 <= point[1] < shape[1]):
+            raise ValueError(f"{name} {point} is outside the {shape} grid")
+    screen_size = _point(data[7], "screen_size")
+    if min(screen_size) <= 0:
+        raise ValueError(f"screen_size must be positive, got {screen_size}")
+    return (*layers, target, spawn, screen_size)
+
+
+def load_track(filename: str, use_cache: bool = True) -> RaceTrack:
+    """
+    Load and validate a saved track. Only numpy arrays and builtins are unpickled, so
+    a crafted file can't run code.
+
+    Tracks already loaded in this process are reused for as long as the file is unchanged.
+    Every call returns a fresh copy, so callers may modify it freely.
+
+    Args:
+        filename (str): Path to a `.pkl` track file.
+        use_cache (bool, optional): Reuse an earlier load of the same file. Defaults to True.
+
+    Raises:
+        ValueError: If the file isn't a valid track (see `validate_track_data`).
+
+    Returns:
+        RaceTrack: The track, with uint8 layers.
+    """
+    stat = os.stat(filename)
+    key = (os.path.realpath(filename), stat.st_mtime_ns, stat.st_size)
+    track = _LOADED_TRACKS.get(key) if use_cache else None
+    if track is None:
+        with open(filename, "rb") as f:
+            try:
+                data = _TrackUnpickler(f).load()
+            except Exception as e:
+                # a damaged pickle can fail in almost any way while it is being rebuilt
+                raise ValueError(f"{filename} is not a valid track file: {e!r}") from e
+        try:
+            track = RaceTrack(*validate_track_data(data))
+        except ValueError as e:
+            raise ValueError(f"{filename}: {e}") from e
+        _LOADED_TRACKS[key] = track
+    track = deepcopy(track)
+    # copies from the cache don't share anything, move tables included
+    track._move_tables = {}
     return track
 
 
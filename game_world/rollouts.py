@@ -0,0 +1,123 @@
+from dataclasses import dataclass
+
+import numpy as np
+
+from game_world.move_table import DIRECTIONS, build_move_table
+from game_world.racetrack import RaceTrack
+from game_world.state_space import ToggleModel
+
+# number of set bits, and the index of the k-th set bit, for every 4 bit move mask
+POPCOUNT = np.array([bin(bits).count("1") for bits in range(16)], dtype=np.int64)
+NTH_BIT = np.zeros((16, 4), dtype=np.int64)
+for _bits in range(16):
+    for _k, _i in enumerate(i for i in range(4) if _bits & (1 << i)):
+        NTH_BIT[_bits, _k] = _i
+STEPS = np.array(DIRECTIONS, dtype=np.int64)
+
+
+@dataclass(frozen=True)
+class RolloutResult:
+    """
+    Attributes:
+        walkers (int): Number of random walks run.
+        finish_rate (float): Fraction of walks that reached the target.
+        mean_steps (float): Mean steps taken by the walks that finished (nan if none did).
+        stuck_rate (float): Fraction of walks that ended with no legal move.
+    """
+
+    walkers: int
+    finish_rate: float
+    mean_steps: float
+    stuck_rate: float
+
+
+def move_tables(model: ToggleModel) -> np.ndarray:
+    """
+    Move tables for every toggle state the buttons can produce, one row per mask.
+    Rows for masks that can never happen are left empty.
+    """
+    rows, cols = model.shape
+    switchable = int(np.bitwise_or.reduce(model.button_bit)) | model.start_mask
+    tables = np.zeros((model.n_states, model.size), dtype=np.uint8)
+    for mask in range(model.n_states):
+        if mask & ~switchable == 0:
+            open_cells = model.open_cells(mask).reshape(rows, cols)
+            tables[mask] = build_move_table(open_cells).ravel()
+    return tables
+
+
+def random_rollouts(
+    track: RaceTrack,
+    walkers: int = 10_000,
+    max_steps: int = 10_000,
+    max_turns_without_progress: int | None = None,
+    seed: int | None = None,
+) -> RolloutResult:
+    """
+    Run many independent random walks (like `random_bot`) at once.
+
+    Every walker is advanced in the same vectorised step: one move table lookup per
+    walker gives its legal moves, one of them is picked uniformly, and button presses
+    flip that walker's own toggle mask.
+
+    Args:
+        track (RaceTrack): The track, in the state a race starts from.
+        walkers (int, optional): Number of walks. Defaults to 10_000.
+        max_steps (int, optional): Walks still going after this many steps count as
+            unfinished. Defaults to 10_000.
+        max_turns_without_progress (int | None, optional): Same rule as `Game`. Defaults to None.
+        seed (int | None, optional): Seed for the random generator. Defaults to None.
+
+    Returns:
+        RolloutResult: How the walks went.
+    """
+    model = ToggleModel(track)
+    tables = move_tables(model)
+    cols = model.shape[1]
+    rng = np.random.default_rng(seed)
+    dawdle_limit = max_turns_without_progress or np.iinfo(np.int64).max
+    target_row, target_col = divmod(model.target, cols)
+
+    row = np.full(walkers, model.spawn // cols, dtype=np.int64)
+    col = np.full(walkers, model.spawn % cols, dtype=np.int64)
+    mask = np.full(walkers, model.start_mask, dtype=np.int64)
+    min_dist = np.full(walkers, np.iinfo(np.int64).max, dtype=np.int64)
+    dawdling = np.zeros(walkers, dtype=np.int64)
+    active = np.ones(walkers, dtype=bool)
+    finished_at = np.full(walkers, -1, dtype=np.int64)
+    stuck = np.zeros(walkers, dtype=bool)
+
+    for step in range(1, max_steps + 1):
+        live = np.flatnonzero(active)
+        if live.size == 0:
+            break
+        cell = row[live] * cols + col[live]
+        legal = tables[mask[live], cell]
+        count = POPCOUNT[legal]
+        blocked = count == 0
+        stuck[live[blocked]] = True
+        active[live[blocked]] = False
+        live, legal, count = live[~blocked], legal[~blocked], count[~blocked]
+
+        choice = (rng.random(live.size) * count).astype(np.int64)
+        direction = NTH_BIT[legal, choice]
+        row[live] += STEPS[direction, 0]
+        col[live] += STEPS[direction, 1]
+        cell = row[live] * cols + col[live]
+        mask[live] ^= model.button_bit[cell]
+
+        dist = np.abs(row[live] - target_row) + np.abs(col[live] - target_col)
+        closer = dist < min_dist[live]
+        min_dist[live] = np.minimum(dist, min_dist[live])
+        dawdling[live] = np.where(closer, 0, dawdling[live] + 1)
+        arrived = cell == model.target
+        finished_at[live[arrived]] = step
+        active[live[arrived | (dawdling[live] >= dawdle_limit)]] = False
+
+    finished = finished_at >= 0
+    return RolloutResult(
+        walkers=walkers,
+        finish_rate=float(finished.mean()),
+        mean_steps=float(finished_at[finished].mean()) if finished.any() else float("nan"),
+        stuck_rate=float(stuck.mean()),
+    )
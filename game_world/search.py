@@ -0,0 +1,127 @@
+from collections import deque
+
+from game_world.state_space import ToggleModel
+
+State = tuple[int, int]  # (flat cell index, toggle mask)
+
+
+def _walk(parents: dict[State, State | None], state: State) -> list[State]:
+    path = []
+    while state is not None:
+        path.append(state)
+        state = parents[state]
+    return path
+
+
+def forward_search(model: ToggleModel) -> tuple[list[int], int]:
+    """
+    Plain breadth first search from spawn to target over (cell, toggle state).
+
+    Returns:
+        tuple[list[int], int]: Flat cells visited after spawn (empty if unsolvable),
+            and the number of states expanded.
+    """
+    start = (model.spawn, model.start_mask)
+    parents: dict[State, State | None] = {start: None}
+    queue = deque([start])
+    expanded = 0
+    while queue:
+        state = queue.popleft()
+        if state[0] == model.target:
+            path = _walk(parents, state)[::-1]
+            return [cell for cell, _ in path[1:]], expanded
+        expanded += 1
+        for nxt in model.successors(*state):
+            if nxt not in parents:
+                parents[nxt] = state
+                queue.append(nxt)
+    return [], expanded
+
+
+def predecessors(model: ToggleModel, cell: int, mask: int) -> list[State]:
+    """
+    All (cell, mask) pairs that reach (cell, mask) in one legal move.
+
+    Button presses are self-inverse, so the mask before stepping onto `cell` is just
+    `mask ^ button_bit[cell]`, and `cell` had to be open in that mask.
+    """
+    before = mask ^ int(model.button_bit[cell])
+    if not model.open_cells(before)[cell]:
+        return []
+    output = []
+    for prev in model.neighbors[cell]:
+        # the race ends on the target, so nothing is ever entered from it
+        if prev == model.target:
+            continue
+        # the racer stood on prev, so it must have been open when it was entered
+        if prev != model.spawn and not model.open_cells(
+            before ^ int(model.button_bit[prev])
+        )[prev]:
+            continue
+        output.append((prev, before))
+    return output
+
+
+def bidirectional_search(model: ToggleModel) -> tuple[list[int], int]:
+    """
+    Breadth first search from spawn and backwards from the target at the same time.
+
+    The toggle state on arrival is unknown, so the backward side starts from the
+    target in every state the buttons can produce. The smaller frontier is expanded
+    one full layer at a time, and the search stops on the first layer where the two
+    sides meet, taking the shortest of all meetings in that layer.
+
+    Returns:
+        tuple[list[int], int]: Flat cells visited after spawn (empty if unsolvable),
+            and the number of states expanded.
+    """
+    start = (model.spawn, model.start_mask)
+    if model.spawn == model.target:
+        return [], 0
+    switchable = 0
+    for bit in set(model.button_bit.tolist()):
+        switchable |= bit
+    goals = [(model.target, m) for m in range(model.n_states) if m & ~switchable == 0]
+
+    fwd_parent: dict[State, State | None] = {start: None}
+    fwd_dist = {start: 0}
+    bwd_parent: dict[State, State | None] = {goal: None for goal in goals}
+    bwd_dist = {goal: 0 for goal in goals}
+    fwd_layer, bwd_layer = [start], goals
+    expanded = 0
+
+    while fwd_layer and bwd_layer:
+        forward = len(fwd_layer) <= len(bwd_layer)
+        if forward:
+            layer, dist, parent, other = fwd_layer, fwd_dist, fwd_parent, bwd_dist
+        else:
+            layer, dist, parent, other = bwd_layer, bwd_dist, bwd_parent, fwd_dist
+        next_layer = []
+        best: tuple[int, State] | None = None
+        for state in layer:
+            expanded += 1
+            if forward:
+                if state[0] == model.target:
+                    continue
+                neighbors = model.successors(*state)
+            else:
+                neighbors = predecessors(model, *state)
+            for nxt in neighbors:
+                if nxt in dist:
+                    continue
+                dist[nxt] = dist[state] + 1
+                parent[nxt] = state
+                next_layer.append(nxt)
+                if nxt in other:
+                    total = dist[nxt] + other[nxt]
+                    if best is None or total < best[0]:
+                        best = (total, nxt)
+        if best is not None:
+            meet = best[1]
+            path = _walk(fwd_parent, meet)[::-1] + _walk(bwd_parent, meet)[1:]
+            return [cell for cell, _ in path[1:]], expanded
+        if forward:
+            fwd_layer = next_layer
+        else:
+            bwd_layer = next_layer
+    return [], expanded
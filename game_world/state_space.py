@@ -0,0 +1,97 @@
+import numpy as np
+
+from game_world.racetrack import RaceTrack
+
+Point = tuple[int, int]
+
+MOVES: tuple[Point, ...] = ((1, 0), (0, 1), (-1, 0), (0, -1))
+
+
+class ToggleModel:
+    """
+    Flat, bit-packed view of a track's toggle dynamics.
+
+    Every wall color gets one bit, so a toggle state is a small int ("mask") saying
+    which colors have been flipped relative to the track as it was handed in.
+    Cells are addressed by flat index (row * cols + col).
+
+    The rules match `Game.tick`: a move into cell n is legal if n is traversable in
+    the current mask, and if n holds a button the mask flips that button's color
+    (the real track flips when the racer leaves the button, but the racer always
+    sees the flipped track while standing on it, so the two are equivalent).
+    """
+
+    def __init__(self, track: RaceTrack) -> None:
+        rows, cols = track.shape
+        self.shape: Point = (rows, cols)
+        self.size = rows * cols
+        self.walls = track.walls.ravel() != 0
+        self.active = track.active.ravel() != 0
+        wall_colors = track.wall_colors.ravel().astype(int)
+        button_colors = track.button_colors.ravel().astype(int)
+        buttons = track.buttons.ravel() != 0
+
+        self.colors: tuple[int, ...] = tuple(
+            int(c) for c in np.unique(wall_colors[self.walls])
+        )
+        self.bit = {color: 1 << i for i, color in enumerate(self.colors)}
+        self.n_states = 1 << len(self.colors)
+
+        # bit of the color each wall belongs to, 0 for open floor
+        self.wall_bit = np.zeros(self.size, dtype=np.int64)
+        for color, bit in self.bit.items():
+            self.wall_bit[self.walls & (wall_colors == color)] = bit
+        # bit flipped by stepping on each cell, 0 if no button or the color has no walls
+        self.button_bit = np.zeros(self.size, dtype=np.int64)
+        for color, bit in self.bit.items():
+            self.button_bit[buttons & (button_colors == color)] = bit
+        self.buttons = buttons
+        self.button_colors = button_colors
+
+        self.spawn = self.index(track.spawn)
+        self.target = self.index(track.target)
+        # the racer is standing on spawn, so a button there is already pressed
+        self.start_mask = int(self.button_bit[self.spawn])
+
+        self.neighbors: list[tuple[int, ...]] = []
+        for row in range(rows):
+            for col in range(cols):
+                self.neighbors.append(
+                    tuple(
+                        (row + dr) * cols + col + dc
+                        for dr, dc in MOVES
+                        if 0 <= row + dr < rows and 0 <= col + dc < cols
+                    )
+                )
+        self._open: dict[int, np.ndarray] = {}
+
+    def index(self, point: Point) -> int:
+        return int(point[0]) * self.shape[1] + int(point[1])
+
+    def point(self, index: int) -> Point:
+        return divmod(int(index), self.shape[1])
+
+    def mask_colors(self, mask: int) -> tuple[int, ...]:
+        """The colors flipped in a given toggle state."""
+        return tuple(color for color, bit in self.bit.items() if mask & bit)
+
+    def open_cells(self, mask: int) -> np.ndarray:
+        """
+        Boolean array (flat) of traversable cells in a toggle state.
+        Results are cached per mask since searches revisit the same few states constantly.
+        """
+        cells = self._open.get(mask)
+        if cells is None:
+            flipped = (self.wall_bit & mask) != 0
+            cells = ~self.walls | ~(self.active ^ flipped)
+            self._open[mask] = cells
+        return cells
+
+    def successors(self, cell: int, mask: int) -> list[tuple[int, int]]:
+        """All (cell, mask) pairs reachable in one legal move."""
+        open_cells = self.open_cells(mask)
+        return [
+            (n, mask ^ int(self.button_bit[n]))
+            for n in self.neighbors[cell]
+            if open_cells[n]
+        ]
@@ -0,0 +1,267 @@
+from collections import OrderedDict
+from copy import copy
+import json
+from typing import Iterator
+
+import numpy as np
+import pygame
+
+from game_world.racetrack import COLORS, Point, RaceTrack, draw_cells
+
+LAYERS = ("walls", "active", "buttons", "wall_colors", "button_colors")
+CHUNK_SIZE = 256
+CACHE_CHUNKS = 64
+
+
+def chunk_blocks(
+    origin: Point, size: Point, shape: Point, chunk_size: int
+) -> Iterator[tuple[Point, tuple[slice, slice], tuple[slice, slice]]]:
+    """
+    Split a rectangle of the track into its overlap with each chunk.
+
+    Yields:
+        tuple[Point, tuple[slice, slice], tuple[slice, slice]]: The chunk's key, the
+            overlap as slices of the rectangle, and the overlap as slices of the chunk.
+    """
+    top, left = origin
+    bottom = min(top + size[0], shape[0])
+    right = min(left + size[1], shape[1])
+    n = chunk_size
+    for chunk_row in range(max(top, 0) // n, -(-bottom // n)):
+        for chunk_col in range(max(left, 0) // n, -(-right // n)):
+            r0, c0 = max(top, chunk_row * n), max(left, chunk_col * n)
+            r1 = min(bottom, (chunk_row + 1) * n)
+            c1 = min(right, (chunk_col + 1) * n)
+            window = (slice(r0 - top, r1 - top), slice(c0 - left, c1 - left))
+            inner = (
+                slice(r0 - chunk_row * n, r1 - chunk_row * n),
+                slice(c0 - chunk_col * n, c1 - chunk_col * n),
+            )
+            yield (chunk_row, chunk_col), window, inner
+
+
+class Chunk:
+    """
+    One square tile of the track, copied out of the memory map.
+
+    `active` holds the current state. The toggles already applied to it are kept in
+    `toggled`, so the chunk can catch up with the track's toggles when it is next used.
+    """
+
+    def __init__(self, data: np.ndarray, toggled: frozenset[int]) -> None:
+        self.walls, self.active, self.buttons, self.wall_colors, self.button_colors = (
+            np.array(layer) for layer in data
+        )
+        walls = self.walls != 0
+        # color -> flat indices of that color's walls, so a toggle touches nothing else
+        self.color_index = {
+            int(color): np.flatnonzero(walls & (self.wall_colors == color))
+            for color in np.unique(self.wall_colors[walls])
+        }
+        self.toggled: frozenset[int] = frozenset()
+        self.sync(toggled)
+
+    def sync(self, toggled: frozenset[int]) -> None:
+        active = self.active.reshape(-1)
+        for color in self.toggled ^ toggled:
+            index = self.color_index.get(color)
+            if index is not None:
+                active[index] ^= 1
+        self.toggled = toggled
+
+
+class LayerView:
+    """Read-only `layer[row, col]` access to one layer of a tiled track."""
+
+    def __init__(self, track: "TiledTrack", layer: str) -> None:
+        self.track = track
+        self.layer = layer
+
+    def __getitem__(self, point: Point) -> int:
+        return int(self.track.cell(point)[self.layer])
+
+
+class TiledTrack:
+    """
+    A track stored as fixed size chunks in a memory mapped file, for grids far too big
+    to hold (or draw) at once.
+
+    Chunks are read lazily and kept in an LRU cache of `cache_chunks` entries. Toggling a
+    color is O(1): the track only records it, and each chunk applies outstanding toggles
+    through its color index the next time it is read. Per cell layers can be read with
+    `track.walls[row, col]` etc. just like on a `RaceTrack`.
+
+    The file holds uint8 layers laid out (chunk_row, chunk_col, layer, row, col), so a
+    chunk is one contiguous read. Shape, spawn, target and screen size live next to it
+    in `<filename>.json`.
+    """
+
+    def __init__(self, filename: str, cache_chunks: int = CACHE_CHUNKS) -> None:
+        with open(filename + ".json") as f:
+            meta = json.load(f)
+        self.filename = filename
+        self.shape: Point = tuple(meta["shape"])
+        self.chunk_size: int = meta["chunk_size"]
+        self.spawn: Point = tuple(meta["spawn"])
+        self.target: Point = tuple(meta["target"])
+        self.screen_size: Point = tuple(meta["screen_size"])
+        self.grid: Point = tuple(-(-n // self.chunk_size) for n in self.shape)
+        self.data = np.memmap(
+            filename,
+            dtype=np.uint8,
+            mode="r",
+            shape=(*self.grid, len(LAYERS), self.chunk_size, self.chunk_size),
+        )
+        self.cache_chunks = cache_chunks
+        self.chunks: OrderedDict[Point, Chunk] = OrderedDict()
+        self.toggled: frozenset[int] = frozenset()
+        self.color_scheme = {i: pygame.Color(c) for i, c in COLORS.items()}
+        for layer in LAYERS:
+            setattr(self, layer, LayerView(self, layer))
+
+    def __deepcopy__(self, memo) -> "TiledTrack":
+        """
+        Copies share the read-only memory map and the cached chunks, and only get their
+        own toggles and LRU order. A shared chunk is brought up to date with whichever
+        copy reads it next, so copying stays cheap however big the track is.
+        """
+        track = copy(self)
+        track.chunks = OrderedDict(self.chunks)
+        for layer in LAYERS:
+            setattr(track, layer, LayerView(track, layer))
+        memo[id(self)] = track
+        return track
+
+    @staticmethod
+    def create(
+        filename: str,
+        shape: Point,
+        spawn: Point,
+        target: Point,
+        screen_size: Point,
+        chunk_size: int = CHUNK_SIZE,
+    ) -> None:
+        """Write an empty (wall free) tiled track to disk."""
+        grid = tuple(-(-n // chunk_size) for n in shape)
+        data = np.memmap(
+            filename,
+            dtype=np.uint8,
+            mode="w+",
+            shape=(*grid, len(LAYERS), chunk_size, chunk_size),
+        )
+        data[:, :, LAYERS.index("active")] = 1
+        data.flush()
+        del data
+        with open(filename + ".json", "w") as f:
+            json.dump(
+                {
+                    "shape": shape,
+                    "chunk_size": chunk_size,
+                    "spawn": spawn,
+                    "target": target,
+                    "screen_size": screen_size,
+                },
+                f,
+            )
+
+    @staticmethod
+    def write_region(filename: str, origin: Point, track: RaceTrack) -> None:
+        """
+        Paint a whole `RaceTrack` into a tiled track file with its top left at `origin`.
+        Handy for building endurance tracks out of ordinary ones.
+        """
+        with open(filename + ".json") as f:
+            meta = json.load(f)
+        size = meta["chunk_size"]
+        grid = tuple(-(-n // size) for n in meta["shape"])
+        data = np.memmap(
+            filename, dtype=np.uint8, mode="r+", shape=(*grid, len(LAYERS), size, size)
+        )
+        for key, window, inner in chunk_blocks(
+            origin, track.shape, tuple(meta["shape"]), size
+        ):
+            for i, layer in enumerate(LAYERS):
+                data[key][i][inner] = getattr(track, layer)[window]
+        data.flush()
+
+    @classmethod
+    def from_racetrack(
+        cls, track: RaceTrack, filename: str, chunk_size: int = CHUNK_SIZE
+    ) -> "TiledTrack":
+        cls.create(
+            filename, track.shape, track.spawn, track.target, track.screen_size, chunk_size
+        )
+        cls.write_region(filename, (0, 0), track)
+        return cls(filename)
+
+    def chunk(self, key: Point) -> Chunk:
+        """Fetch a chunk, loading it from disk if it isn't cached."""
+        chunk = self.chunks.get(key)
+        if chunk is None:
+            chunk = Chunk(self.data[key], self.toggled)
+            self.chunks[key] = chunk
+            if len(self.chunks) > self.cache_chunks:
+                self.chunks.popitem(last=False)
+        else:
+            self.chunks.move_to_end(key)
+            if chunk.toggled != self.toggled:
+                chunk.sync(self.toggled)
+        return chunk
+
+    def cell(self, point: Point) -> dict[str, int]:
+        row, col = point
+        if not (0 <= row < self.shape[0] and 0 <= col < self.shape[1]):
+            raise IndexError(f"{point} is outside the track")
+        chunk = self.chunk((row // self.chunk_size, col // self.chunk_size))
+        r, c = row % self.chunk_size, col % self.chunk_size
+        return {layer: getattr(chunk, layer)[r, c] for layer in LAYERS}
+
+    def is_traversable(self, point: Point) -> bool:
+        cell = self.cell(point)
+        return bool(cell["walls"] == 0 or cell["active"] == 0)
+
+    def toggle(self, color: int) -> None:
+        self.toggled = self.toggled ^ {int(color)}
+
+    def window(self, origin: Point, size: Point) -> dict[str, np.ndarray]:
+        """
+        Current layers of a rectangular window, stitched together from the chunks it
+        overlaps. Parts of the window outside the track read as empty floor.
+        """
+        out = {layer: np.zeros(size, dtype=np.uint8) for layer in LAYERS}
+        for key, window, inner in chunk_blocks(
+            origin, size, self.shape, self.chunk_size
+        ):
+            chunk = self.chunk(key)
+            for layer in LAYERS:
+                out[layer][window] = getattr(chunk, layer)[inner]
+        return out
+
+    def render_viewport(self, origin: Point, cells: Point) -> pygame.Surface:
+        """
+        Draw only the cells in view.
+
+        Args:
+            origin (Point): Track coordinates (row, col) of the top left visible cell.
+            cells (Point): How many rows and columns fit on screen.
+
+        Returns:
+            pygame.Surface: A `screen_size` surface showing the viewport.
+        """
+        surface = pygame.Surface(self.screen_size)
+        surface.fill("#ffffff")
+        layers = self.window(origin, cells)
+        draw_cells(
+            surface,
+            origin,
+            (self.screen_size[0] / cells[1], self.screen_size[1] / cells[0]),
+            layers["walls"],
+            layers["active"],
+            layers["buttons"],
+            layers["wall_colors"],
+            layers["button_colors"],
+            self.spawn,
+            self.target,
+            self.color_scheme,
+        )
+        return surface
@@ -3,7 +3,8 @@ import sys
 import pygame
 import pygame.locals
 
-from racetrack import RaceTrack, blank_track, load_track
+from game_world.racetrack import RaceTrack, blank_track, load_track
+from game_world.track_edits import Edit, TrackEditor
 
 WIDTH = 600
 GRID_SIZE = (20, 20)
@@ -11,8 +12,12 @@ GRID_SIZE = (20, 20)
 SAVE_FILE_NAME = "tracks/bbbmaze.pkl"
 STARTING_TRACK_NAME = "tracks/bbbmaze.pkl" # None if you want to start blank.
 # STARTING_TRACK_NAME = "tracks/maze.pkl" # None if you want to start blank.
+# Run from the repo root with `python -m game_world.track_builder`
 # Hold A to paint in deactivated walls
 # press up and down on arrow keys to increase brush size
+# Hold R while dragging to fill a rectangle, hold F and click to flood fill
+# Press X to swap the selected color with the one selected before it
+# Ctrl+Z to undo, Ctrl+Y to redo
 
 
 class Button:
@@ -46,45 +51,11 @@ def make_solid_colored_button(
     return Button(x, y, width, height, surface)
 
 
-def click_track(
-    track: RaceTrack,
-    selected_color: int,
-    selected_kind: str,
-    mx: int,
-    my: int,
-    cursor_size: int,
-    handled_points: set[tuple[int, int]],
-    shift_held: bool,
-):
-    row, col = track.get_grid_coord(mx, my)
-    for r in range(row - cursor_size + 1, row + cursor_size):
-        for c in range(col - cursor_size + 1, col + cursor_size):
-            if (
-                r not in range(track.shape[0])
-                or c not in range(track.shape[1])
-                or (r, c) in handled_points
-            ):
-                continue
-            handled_points.add((r, c))
-            match selected_kind:
-                case "wall":
-                    if selected_color != 0:
-                        track.walls[r, c] = 1
-                        track.active[r, c] = 1 - int(shift_held)
-                    else:
-                        track.walls[r, c] = 0
-                    track.wall_colors[r, c] = selected_color
-                case "button":
-                    track.buttons[r, c] = 0 if selected_color == 0 else 1
-                    track.button_colors[r, c] = (
-                        track.button_colors[r, c]
-                        if selected_color == 0
-                        else selected_color
-                    )
-                case "target":
-                    track.target = (r, c)
-                case "spawn":
-                    track.spawn = (r, c)
+def redraw(surface: pygame.Surface, track: RaceTrack, edit: Edit | None) -> None:
+    """Redraw only the part of the track an edit touched."""
+    bounds = edit.bounds(track.shape[1]) if edit else None
+    if bounds is not None:
+        track.render_region(surface, *bounds)
 
 
 def main():
@@ -100,6 +71,7 @@ def main():
         else blank_track(GRID_SIZE, screen_size, 7)
     )
     track_surface = track.render()
+    editor = TrackEditor(track)
     color_buttons = {
         i: make_solid_colored_button(screen_size[0] + 30, 20 + 50 * i, 30, 30, color)
         for i, color in track.color_scheme.items()
@@ -122,12 +94,15 @@ def main():
     }
 
     selected_color = 1
+    previous_color = 0
     selected_kind = "wall"
     pressed = False
     shift_held = False
+    rectangle_held = False
+    fill_held = False
+    drag_start: tuple[int, int] | None = None
 
     cursor_size = 1
-    handled_points = set()
 
     while True:
         screen.fill("#A6A6A6")
@@ -139,14 +114,30 @@ def main():
             elif event.type == pygame.locals.MOUSEBUTTONDOWN:
                 pressed = True
                 for i, button in color_buttons.items():
-                    if button.point_inside(mx, my):
-                        selected_color = i
+                    if button.point_inside(mx, my) and i != selected_color:
+                        previous_color, selected_color = selected_color, i
                 for kind, button in type_buttons.items():
                     if button.point_inside(mx, my):
                         selected_kind = kind
+                editor.begin_stroke()
+                drag_start = track.get_grid_coord(mx, my)
+                if fill_held and selected_kind in ("wall", "button"):
+                    edit = editor.flood_fill(
+                        drag_start, selected_kind, selected_color, shift_held
+                    )
+                    redraw(track_surface, track, edit)
             elif event.type == pygame.locals.MOUSEBUTTONUP:
                 pressed = False
-                handled_points.clear()
+                if rectangle_held and selected_kind in ("wall", "button"):
+                    edit = editor.rectangle(
+                        drag_start,
+                        track.get_grid_coord(mx, my),
+                        selected_kind,
+                        selected_color,
+                        shift_held,
+                    )
+                    redraw(track_surface, track, edit)
+                editor.end_stroke()
             elif event.type == pygame.locals.KEYDOWN:
                 if event.key == pygame.K_UP:
                     cursor_size += 1
@@ -155,24 +146,38 @@ def main():
                 elif event.key == pygame.K_RETURN:
                     track.save(SAVE_FILE_NAME)
                     print(f"Saved track to {SAVE_FILE_NAME}")
+                    for problem in track.analyze().problems:
+                        print(f"Warning: {problem}")
+                elif event.key == pygame.K_z and event.mod & pygame.KMOD_CTRL:
+                    redraw(track_surface, track, editor.undo())
+                elif event.key == pygame.K_y and event.mod & pygame.KMOD_CTRL:
+                    redraw(track_surface, track, editor.redo())
+                elif event.key == pygame.K_x:
+                    edit = editor.swap_colors(selected_color, previous_color)
+                    redraw(track_surface, track, edit)
                 elif event.key == pygame.K_a:
                     shift_held = True
+                elif event.key == pygame.K_r:
+                    rectangle_held = True
+                elif event.key == pygame.K_f:
+                    fill_held = True
             elif event.type == pygame.locals.KEYUP:
                 if event.key == pygame.K_a:
                     shift_held = False
-
-        if pressed:
-            click_track(
-                track,
-                selected_color,
-                selected_kind,
-                mx,
-                my,
+                elif event.key == pygame.K_r:
+                    rectangle_held = False
+                elif event.key == pygame.K_f:
+                    fill_held = False
+
+        if pressed and not (rectangle_held or fill_held):
+            edit = editor.brush(
+                track.get_grid_coord(mx, my),
                 cursor_size,
-                handled_points,
+                selected_kind,
+                selected_color,
                 shift_held,
             )
-            track_surface = track.render()
+            redraw(track_surface, track, edit)
 
         screen.blit(track_surface, (0, 0))
         for i, button in color_buttons.items():
@@ -0,0 +1,370 @@
+from dataclasses import dataclass, field
+
+import numpy as np
+
+from game_world.racetrack import Point, RaceTrack
+
+LAYERS = ("walls", "active", "buttons", "wall_colors", "button_colors")
+MAX_HISTORY = 1000
+NO_CELLS = np.empty(0, dtype=np.int64)
+
+
+def connected_region(grid: np.ndarray, start: Point) -> np.ndarray:
+    """
+    Cells of a boolean grid 4-connected to `start`.
+
+    Each row is split into runs of set cells with array ops, and the search then walks
+    runs instead of cells, so a big open area costs about one step per row.
+
+    Returns:
+        np.ndarray: Boolean grid, set on the connected cells.
+    """
+    rows, cols = grid.shape
+    if not grid[start]:
+        return np.zeros(grid.shape, dtype=bool)
+    padded = np.zeros((rows, cols + 2), dtype=np.int8)
+    padded[:, 1:-1] = grid
+    edges = np.diff(padded, axis=1)
+    run_rows, run_starts = np.nonzero(edges == 1)
+    _, run_ends = np.nonzero(edges == -1)
+    # runs are sorted by row then column, row r's runs are first[r]:first[r + 1]
+    first = np.searchsorted(run_rows, np.arange(rows + 1))
+
+    # +1 where a reached run starts and -1 just past its end, summed along rows below
+    region = np.zeros(rows * (cols + 1), dtype=np.int8)
+    row, col = start
+    lo, hi = first[row], first[row + 1]
+    seed = lo + int(np.searchsorted(run_starts[lo:hi], col, side="right")) - 1
+    seen = {seed}
+    stack = [seed]
+    while stack:
+        run = stack.pop()
+        row, begin, end = run_rows[run], run_starts[run], run_ends[run]
+        region[row * (cols + 1) + begin] += 1
+        region[row * (cols + 1) + end] -= 1
+        for other in (row - 1, row + 1):
+            if not 0 <= other < rows:
+                continue
+            lo, hi = first[other], first[other + 1]
+            # runs in the next row overlapping [begin, end)
+            left = lo + int(np.searchsorted(run_ends[lo:hi], begin, side="right"))
+            right = lo + int(np.searchsorted(run_starts[lo:hi], end, side="left"))
+            for neighbor in range(left, right):
+                if neighbor not in seen:
+                    seen.add(neighbor)
+                    stack.append(neighbor)
+    return np.cumsum(region.reshape(rows, cols + 1), axis=1)[:, :cols] > 0
+
+
+@dataclass
+class Edit:
+    """
+    One undoable change to a track, stored as a diff.
+
+    Only cells that changed are kept, as flat indices, and only the layers that changed
+    get their before and after values stored.
+
+    Attributes:
+        cells (np.ndarray): Flat indices (row * cols + col) of the changed cells.
+        layers (dict[str, tuple[np.ndarray, np.ndarray]]): Layer name -> values at
+            `cells` before and after the edit.
+        points (dict[str, tuple[Point, Point]]): "spawn" and/or "target" -> position
+            before and after the edit.
+    """
+
+    cells: np.ndarray
+    layers: dict[str, tuple[np.ndarray, np.ndarray]] = field(default_factory=dict)
+    points: dict[str, tuple[Point, Point]] = field(default_factory=dict)
+
+    def __bool__(self) -> bool:
+        return bool(self.cells.size or self.points)
+
+    @property
+    def nbytes(self) -> int:
+        """Memory held by the diff."""
+        values = sum(old.nbytes + new.nbytes for old, new in self.layers.values())
+        return self.cells.nbytes + values
+
+    def apply(self, track: RaceTrack, undo: bool = False) -> None:
+        """Redo the edit on a track, or undo it."""
+        side = 0 if undo else 1
+        for layer, values in self.layers.items():
+            getattr(track, layer).flat[self.cells] = values[side]
+        for name, values in self.points.items():
+            setattr(track, name, values[side])
+
+    def bounds(self, cols: int) -> tuple[Point, Point] | None:
+        """Top left and bottom right cell (inclusive) touched by the edit."""
+        points = [point for values in self.points.values() for point in values]
+        rows, columns = np.divmod(self.cells, cols)
+        rows = np.concatenate((rows, [point[0] for point in points])).astype(int)
+        columns = np.concatenate((columns, [point[1] for point in points])).astype(int)
+        if not rows.size:
+            return None
+        top_left = int(rows.min()), int(columns.min())
+        return top_left, (int(rows.max()), int(columns.max()))
+
+
+class TrackEditor:
+    """
+    Whole-area edits on a `RaceTrack` with undo and redo.
+
+    Every operation writes a block of cells with one NumPy assignment per layer, then
+    keeps only the cells that actually changed as an `Edit`. Edits made between
+    `begin_stroke` and `end_stroke` (a mouse drag, say) are merged into one, so they are
+    undone together. Painting follows the track builder's rules: color 0 erases.
+    """
+
+    def __init__(self, track: RaceTrack, max_history: int = MAX_HISTORY) -> None:
+        self.track = track
+        self.max_history = max_history
+        self.undo_stack: list[Edit] = []
+        self.redo_stack: list[Edit] = []
+        self._stroke: list[Edit] | None = None
+
+    def _window(self, corner_a: Point, corner_b: Point) -> tuple[slice, slice] | None:
+        """Slices for the rectangle between two corners, clipped to the track."""
+        rows, cols = self.track.shape
+        r0, r1 = sorted((corner_a[0], corner_b[0]))
+        c0, c1 = sorted((corner_a[1], corner_b[1]))
+        r0, c0 = max(r0, 0), max(c0, 0)
+        r1, c1 = min(r1, rows - 1), min(c1, cols - 1)
+        if r0 > r1 or c0 > c1:
+            return None
+        return slice(r0, r1 + 1), slice(c0, c1 + 1)
+
+    def _paint(
+        self,
+        window: tuple[slice, slice] | None,
+        where: np.ndarray | None,
+        kind: str,
+        color: int,
+        inactive: bool,
+    ) -> Edit:
+        """Paint `kind` in `color` onto a window, only where `where` is set if given."""
+        if window is None:
+            return self._record(NO_CELLS, {})
+        track = self.track
+        before = {layer: getattr(track, layer)[window].copy() for layer in LAYERS}
+        after = {layer: values.copy() for layer, values in before.items()}
+        selected = np.ones(before["walls"].shape, bool) if where is None else where
+        if kind == "wall":
+            if color != 0:
+                after["walls"][selected] = 1
+                after["active"][selected] = 0 if inactive else 1
+            else:
+                after["walls"][selected] = 0
+            after["wall_colors"][selected] = color
+        elif kind == "button":
+            after["buttons"][selected] = 0 if color == 0 else 1
+            if color != 0:
+                after["button_colors"][selected] = color
+        else:
+            raise ValueError(f"Can't paint {kind!r}, only walls and buttons")
+
+        changed = np.zeros(selected.shape, dtype=bool)
+        for layer in LAYERS:
+            changed |= before[layer] != after[layer]
+        local_rows, local_cols = np.nonzero(changed)
+        cells = np.ravel_multi_index(
+            (local_rows + window[0].start, local_cols + window[1].start), track.shape
+        )
+        layers = {}
+        for layer in LAYERS:
+            old, new = before[layer][changed], after[layer][changed]
+            if (old != new).any():
+                layers[layer] = (old, new)
+                getattr(track, layer)[window] = after[layer]
+        return self._record(cells, layers)
+
+    def _record(
+        self,
+        cells: np.ndarray,
+        layers: dict[str, tuple[np.ndarray, np.ndarray]],
+        points: dict[str, tuple[Point, Point]] | None = None,
+    ) -> Edit:
+        index_dtype = np.int32 if self.track.walls.size < 2**31 else np.int64
+        edit = Edit(cells.astype(index_dtype), layers, points or {})
+        if not edit:
+            return edit
+        if self._stroke is not None:
+            self._stroke.append(edit)
+        else:
+            self._push(edit)
+        return edit
+
+    def _push(self, edit: Edit) -> None:
+        self.undo_stack.append(edit)
+        if len(self.undo_stack) > self.max_history:
+            del self.undo_stack[0]
+        self.redo_stack.clear()
+
+    def brush(
+        self, center: Point, size: int, kind: str, color: int, inactive: bool = False
+    ) -> Edit:
+        """
+        Paint a square brush, `size` 1 being a single cell, or move spawn or target.
+
+        Args:
+            center (Point): Cell under the cursor.
+            size (int): Brush size, the square is 2 * size - 1 cells across.
+            kind (str): "wall", "button", "spawn" or "target".
+            color (int): Color to paint, 0 erases.
+            inactive (bool, optional): Paint walls deactivated. Defaults to False.
+
+        Returns:
+            Edit: What changed (empty if nothing did).
+        """
+        if kind in ("spawn", "target"):
+            return self.place(kind, center)
+        row, col = center
+        window = self._window(
+            (row - size + 1, col - size + 1), (row + size - 1, col + size - 1)
+        )
+        return self._paint(window, None, kind, color, inactive)
+
+    def rectangle(
+        self,
+        corner_a: Point,
+        corner_b: Point,
+        kind: str,
+        color: int,
+        inactive: bool = False,
+    ) -> Edit:
+        """Fill the rectangle between two corners (inclusive)."""
+        window = self._window(corner_a, corner_b)
+        return self._paint(window, None, kind, color, inactive)
+
+    def flood_fill(
+        self, start: Point, kind: str, color: int, inactive: bool = False
+    ) -> Edit:
+        """
+        Repaint the region of cells connected to `start` that look the same as it.
+        Only what a cell shows counts: for walls, whether it is a wall and, if so, its
+        activity and color; for buttons, whether it is a wall, whether it has a button
+        and, if so, the button's color. Leftover values under erased walls or buttons
+        are ignored. See `connected_region`.
+        """
+        if kind not in ("wall", "button"):
+            raise ValueError(f"Can't fill {kind!r}, only walls and buttons")
+        track = self.track
+        if self._window(start, start) is None:
+            return self._record(NO_CELLS, {})
+        walls = track.walls != 0
+        same = walls == walls[start]
+        if kind == "wall" and walls[start]:
+            active = track.active != 0
+            same &= active == active[start]
+            same &= track.wall_colors == track.wall_colors[start]
+        elif kind == "button":
+            buttons = track.buttons != 0
+            same &= buttons == buttons[start]
+            if buttons[start]:
+                same &= track.button_colors == track.button_colors[start]
+        region = connected_region(same, start)
+        rows, cols = np.nonzero(region)
+        window = self._window((rows.min(), cols.min()), (rows.max(), cols.max()))
+        return self._paint(window, region[window], kind, color, inactive)
+
+    def swap_colors(self, color_a: int, color_b: int) -> Edit:
+        """Swap two colors on every wall and button."""
+        track = self.track
+        if color_a == color_b:
+            return self._record(NO_CELLS, {})
+        # color layers only mean something where there is a wall or button
+        owners = {"wall_colors": track.walls, "button_colors": track.buttons}
+        swapped = {}
+        for layer, owner in owners.items():
+            colors = getattr(track, layer).reshape(-1)
+            swapped[layer] = (owner.reshape(-1) != 0) & (
+                (colors == color_a) | (colors == color_b)
+            )
+        cells = np.flatnonzero(swapped["wall_colors"] | swapped["button_colors"])
+        layers = {}
+        for layer in owners:
+            values = getattr(track, layer)
+            old = values.flat[cells]
+            new = old.copy()
+            swap = swapped[layer][cells]
+            new[swap & (old == color_a)] = color_b
+            new[swap & (old == color_b)] = color_a
+            if (old != new).any():
+                layers[layer] = (old, new)
+                values.flat[cells] = new
+        return self._record(cells, layers)
+
+    def place(self, kind: str, point: Point) -> Edit:
+        """Move the spawn or the target."""
+        if kind not in ("spawn", "target"):
+            raise ValueError(f"Can only place spawn or target, not {kind!r}")
+        old, point = tuple(getattr(self.track, kind)), tuple(point)
+        if old == point or self._window(point, point) is None:
+            return self._record(NO_CELLS, {})
+        setattr(self.track, kind, point)
+        return self._record(NO_CELLS, {}, {kind: (old, point)})
+
+    def begin_stroke(self) -> None:
+        self.end_stroke()
+        self._stroke = []
+
+    def end_stroke(self) -> Edit | None:
+        """Merge the stroke's edits into one history entry."""
+        stroke, self._stroke = self._stroke, None
+        if not stroke:
+            return None
+        edit = stroke[0] if len(stroke) == 1 else self._merge(stroke)
+        if edit:
+            self._push(edit)
+        return edit
+
+    def _merge(self, edits: list[Edit]) -> Edit:
+        """One edit with the effect of several made in a row."""
+        cells = np.unique(np.concatenate([edit.cells for edit in edits]))
+        layers = {}
+        for layer in LAYERS:
+            if not any(layer in edit.layers for edit in edits):
+                continue
+            after = getattr(self.track, layer).flat[cells]
+            before = after.copy()
+            # walk back through the stroke so each cell ends up with its oldest value
+            for edit in reversed(edits):
+                if layer in edit.layers:
+                    before[np.searchsorted(cells, edit.cells)] = edit.layers[layer][0]
+            layers[layer] = (before, after)
+        changed = np.zeros(cells.shape, dtype=bool)
+        for before, after in layers.values():
+            changed |= before != after
+        points = {}
+        for edit in edits:
+            for name, (old, new) in edit.points.items():
+                points[name] = (points.get(name, (old, new))[0], new)
+        points = {name: p for name, p in points.items() if p[0] != p[1]}
+        return Edit(
+            cells[changed],
+            {
+                layer: (before[changed], after[changed])
+                for layer, (before, after) in layers.items()
+                if (before != after).any()
+            },
+            points,
+        )
+
+    def undo(self) -> Edit | None:
+        """Revert the last edit, returns it (None if there was nothing to undo)."""
+        self.end_stroke()
+        if not self.undo_stack:
+            return None
+        edit = self.undo_stack.pop()
+        edit.apply(self.track, undo=True)
+        self.redo_stack.append(edit)
+        return edit
+
+    def redo(self) -> Edit | None:
+        """Reapply the last undone edit, returns it (None if nothing was undone)."""
+        self.end_stroke()
+        if not self.redo_stack:
+            return None
+        edit = self.redo_stack.pop()
+        edit.apply(self.track)
+        self.undo_stack.append(edit)
+        return edit
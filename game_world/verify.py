@@ -0,0 +1,134 @@
+from dataclasses import dataclass
+
+import numpy as np
+
+from game import (
+    CRASHED_INTO_WALL,
+    OUT_OF_BOUNDS,
+    dawdling_message,
+    finish_message,
+    illegal_move_message,
+)
+from game_world.state_space import ToggleModel
+
+Point = tuple[int, int]
+
+
+@dataclass(frozen=True)
+class HistoryCheck:
+    """
+    What the rules say about a race, worked out from its moves alone.
+
+    Attributes:
+        finished (bool): Whether the moves end on the target.
+        steps (int): Moves played before the race ended (or all of them if it didn't).
+        message (str | None): `Game`'s verdict for how the race ended, None if the moves
+            run out while the racer is still going. Timing can't be checked from moves,
+            so a race that timed out or crashed shows up as one that never ended.
+        extra_moves (int): Moves listed after the race had already ended.
+    """
+
+    finished: bool
+    steps: int
+    message: str | None
+    extra_moves: int
+
+    @property
+    def legal(self) -> bool:
+        """No move broke the rules and nothing was played after the race ended."""
+        return (self.message is None or self.finished) and not self.extra_moves
+
+
+def _moves(history: list) -> tuple[np.ndarray, np.ndarray]:
+    """Moves as an (n, 2) int array, plus which of them are unit steps."""
+    try:
+        moves = np.array(history, dtype=float).reshape(len(history), 2)
+    except (TypeError, ValueError):
+        # something that isn't a pair of numbers, look at the moves one by one
+        moves = np.zeros((len(history), 2))
+        for i, move in enumerate(history):
+            try:
+                moves[i] = np.array(move, dtype=float).reshape(2)
+            except (TypeError, ValueError):
+                moves[i] = (np.nan, np.nan)
+    unit = np.isfinite(moves).all(axis=1) & (np.abs(moves).sum(axis=1) == 1)
+    unit &= (moves == np.round(moves)).all(axis=1)
+    return np.where(unit[:, None], moves, 0).astype(np.int64), unit
+
+
+def verify_history(
+    model: ToggleModel,
+    history: list[Point],
+    max_turns_without_progress: int | None = None,
+) -> HistoryCheck:
+    """
+    Replay a `Game.history` against the rules in one vectorised pass, without running
+    the racer or copying the track.
+
+    Positions come from a cumulative sum of the moves and toggle states from a
+    cumulative xor of the buttons stepped on, so every move's legality is known at once.
+    The race ends at the first move that is illegal, leaves the grid, hits a wall,
+    dawdles too long or reaches the target, checked in the same order as `Game.tick`.
+
+    Args:
+        model (ToggleModel): Model of the track as the race started (not pruned).
+        history (list[Point]): Moves in the order they were played.
+        max_turns_without_progress (int | None, optional): Same rule as `Game`. Defaults to None.
+
+    Returns:
+        HistoryCheck: The verdict.
+    """
+    n = len(history)
+    rows, cols = model.shape
+    moves, unit = _moves(history)
+    spawn_row, spawn_col = model.point(model.spawn)
+    target_row, target_col = model.point(model.target)
+    row = spawn_row + np.cumsum(moves[:, 0])
+    col = spawn_col + np.cumsum(moves[:, 1])
+    inside = (row >= 0) & (row < rows) & (col >= 0) & (col < cols)
+    cells = np.where(inside, row * cols + col, 0)
+
+    pressed = np.where(inside, model.button_bit[cells], 0)
+    after = model.start_mask ^ np.bitwise_xor.accumulate(pressed)
+    before = np.concatenate(([model.start_mask], after[:-1]))
+    flipped = (model.wall_bit[cells] & before) != 0
+    walkable = ~model.walls[cells] | (model.active[cells] == flipped)
+
+    dist = np.abs(row - target_row) + np.abs(col - target_col)
+    best_before = np.concatenate(
+        ([np.iinfo(np.int64).max], np.minimum.accumulate(dist)[:-1])
+    )
+    step = np.arange(n)
+    last_progress = np.maximum.accumulate(np.where(dist < best_before, step, -1))
+    dawdling = step - last_progress
+    limit = max_turns_without_progress or np.iinfo(np.int64).max
+
+    # every way a move can end the race, in the order Game.tick checks them
+    endings = (
+        (~unit, "illegal"),
+        (~inside, OUT_OF_BOUNDS),
+        (~walkable, CRASHED_INTO_WALL),
+        (dawdling >= limit, "dawdling"),
+        (cells == model.target, "finish"),
+    )
+    ended = np.zeros(n, dtype=bool)
+    for happened, _ in endings:
+        ended |= happened
+    if not ended.any():
+        return HistoryCheck(finished=False, steps=n, message=None, extra_moves=0)
+    last = int(np.argmax(ended))
+    reason = next(reason for happened, reason in endings if happened[last])
+    if reason == "illegal":
+        message = illegal_move_message(history[last])
+    elif reason == "dawdling":
+        message = dawdling_message(dawdling[last])
+    elif reason == "finish":
+        message = finish_message(last + 1)
+    else:
+        message = reason
+    return HistoryCheck(
+        finished=reason == "finish",
+        steps=last + 1,
+        message=message,
+        extra_moves=n - last - 1,
+    )
@@ -0,0 +1,18 @@
+import random
+from game_world.move_table import LEGAL_MOVES
+from game_world.racetrack import RaceTrack
+
+
+Point = tuple[int, int]
+
+
+def greedy_move(loc: Point, track: RaceTrack) -> Point:
+    """Step towards the target if possible, picking randomly between equally good moves."""
+    options = LEGAL_MOVES[track.move_table()[loc]]
+    target = track.target
+
+    def dist(move: Point) -> int:
+        return abs(loc[0] + move[0] - target[0]) + abs(loc[1] + move[1] - target[1])
+
+    best = min(dist(move) for move in options)
+    return random.choice([move for move in options if dist(move) == best])
@@ -0,0 +1,204 @@
+import traceback
+
+import numpy as np
+
+from game import (
+    CLOCKS,
+    CRASHED_INTO_WALL,
+    OUT_OF_BOUNDS,
+    TIMED_OUT,
+    Player,
+    Point,
+    PreparedPlayer,
+    Status,
+    Timing,
+    dawdling_message,
+    finish_message,
+    illegal_move_message,
+    manhattan_dist,
+)
+from game_world.racetrack import RaceTrack
+
+MOVES = {(1, 0), (-1, 0), (0, 1), (0, -1)}
+
+
+class MultiGame:
+    """
+    K racers on one shared track with one shared button state.
+
+    Every tick all racers still going pick a move against the same track, then all moves
+    happen at once. Moves are checked against the track as it was at the start of the
+    tick, and afterwards each button stepped on flips its color once. Two racers
+    pressing the same color in the same tick therefore cancel out, and the result never
+    depends on the order racers are listed in. With one racer this is exactly `Game`.
+
+    The track is never copied per racer: everyone is handed the same `RaceTrack`, so
+    racers must not modify it. Traversability is kept in one boolean array that is
+    patched in place through a per-color index of wall cells whenever a color toggles.
+
+    Racers that are `PreparedPlayer`s are reset and prepared once before the first
+    tick, as in `Game`, against the same shared track the first tick will show them.
+    """
+
+    def __init__(
+        self,
+        players: list[Player],
+        track: RaceTrack,
+        time: float,
+        delay: float,
+        max_turns_without_progress: int | None = None,
+        timing: Timing = Timing.WALL,
+        time_scale: float = 1.0,
+        prepare_time: float | None = None,
+    ) -> None:
+        self.players = players
+        self.track = RaceTrack(
+            track.walls.copy(),
+            track.active.copy(),
+            track.buttons,
+            track.wall_colors,
+            track.button_colors,
+            track.target,
+            track.spawn,
+            track.screen_size,
+        )
+        walls = track.walls != 0
+        self.color_index = {
+            int(color): np.nonzero(walls & (track.wall_colors == color))
+            for color in np.unique(track.wall_colors[walls])
+        }
+        self.traversable = ~walls | (track.active == 0)
+        self.delay = delay
+        self.max_turns_without_progress = (
+            max_turns_without_progress if max_turns_without_progress else float("inf")
+        )
+        self.clock = CLOCKS[timing]
+        self.time_scale = time_scale
+        k = len(players)
+        self.time = [time] * k
+        self.pos: list[Point] = [track.spawn] * k
+        self.min_dist = [float("inf")] * k
+        self.turns_without_progress = [0] * k
+        self.status = [Status.ONGOING] * k
+        self.messages = ["Just Started."] * k
+        self.history: list[list[Point]] = [[] for _ in players]
+        # time charged for each racer's moves, after scaling
+        self.move_times: list[list[float]] = [[] for _ in players]
+        self.ticks = 0
+        self.prepare_time = prepare_time
+        self.prepared = False
+        # time each racer's prepare phase took, after scaling
+        self.time_preparing = [0.0] * k
+        # every racer is standing on spawn, so a button there is pressed once per racer
+        if track.buttons[track.spawn] and k % 2:
+            self.toggle(int(track.button_colors[track.spawn]))
+
+    def toggle(self, color: int) -> None:
+        index = self.color_index.get(color)
+        if index is None:
+            return
+        self.track.active[index] = 1 - self.track.active[index]
+        # keep the track's per toggle state caches (move tables) in step
+        self.track.toggled = self.track.toggled ^ {color}
+        self.traversable[index] = ~self.traversable[index]
+
+    def _finish(self, i: int, status: Status, msg: str) -> None:
+        self.status[i] = status
+        self.messages[i] = msg
+
+    def prepare(self) -> None:
+        """
+        Run every racer's reset and prepare phase, if it has one.
+        Called automatically before the first tick.
+        """
+        self.prepared = True
+        for i, player in enumerate(self.players):
+            if not isinstance(player, PreparedPlayer):
+                continue
+            start_time = self.clock()
+            try:
+                player.reset()
+                player.prepare(self.track)
+            except Exception:
+                self._finish(
+                    i,
+                    Status.DNF,
+                    f"Racer crashed while preparing with the following error message:\n{traceback.format_exc()}",
+                )
+                continue
+            self.time_preparing[i] = (self.clock() - start_time) * self.time_scale
+            if (
+                self.prepare_time is not None
+                and self.time_preparing[i] > self.prepare_time
+            ):
+                self._finish(i, Status.DNF, "Timed Out while preparing")
+
+    def tick(self) -> bool:
+        """
+        Advance every racer still going by one move.
+
+        Returns:
+            bool: Whether any racer is still going.
+        """
+        if not self.prepared:
+            self.prepare()
+        self.ticks += 1
+        rows, cols = self.track.shape
+        pressed: dict[int, int] = {}
+        for i, player in enumerate(self.players):
+            if self.status[i] != Status.ONGOING:
+                continue
+            start_time = self.clock()
+            try:
+                action = player(self.pos[i], self.track)
+            except Exception:
+                self._finish(
+                    i,
+                    Status.DNF,
+                    f"Racer crashed with the following error message:\n{traceback.format_exc()}",
+                )
+                continue
+            time_taken = (self.clock() - start_time) * self.time_scale
+            self.move_times[i].append(time_taken)
+            self.time[i] -= time_taken
+            self.history[i].append(action)
+            if self.time[i] < 0:
+                self._finish(i, Status.DNF, TIMED_OUT)
+                continue
+            self.time[i] += min(time_taken, self.delay)
+            if action not in MOVES:
+                self._finish(i, Status.DNF, illegal_move_message(action))
+                continue
+            pos = (self.pos[i][0] + action[0], self.pos[i][1] + action[1])
+            self.pos[i] = pos
+            if not (0 <= pos[0] < rows and 0 <= pos[1] < cols):
+                self._finish(i, Status.DNF, OUT_OF_BOUNDS)
+                continue
+            if not self.traversable[pos]:
+                self._finish(i, Status.DNF, CRASHED_INTO_WALL)
+                continue
+            if self.track.buttons[pos]:
+                color = int(self.track.button_colors[pos])
+                pressed[color] = pressed.get(color, 0) ^ 1
+            new_dist = manhattan_dist(pos, self.track.target)
+            if new_dist < self.min_dist[i]:
+                self.min_dist[i] = new_dist
+                self.turns_without_progress[i] = 0
+            else:
+                self.turns_without_progress[i] += 1
+                if self.turns_without_progress[i] >= self.max_turns_without_progress:
+                    self._finish(
+                        i, Status.DNF, dawdling_message(self.turns_without_progress[i])
+                    )
+                    continue
+            if pos == self.track.target:
+                self._finish(i, Status.FINISH, finish_message(len(self.history[i])))
+        for color, odd in sorted(pressed.items()):
+            if odd:
+                self.toggle(color)
+        return Status.ONGOING in self.status
+
+    def play_game(self) -> list[tuple[Status, str]]:
+        while self.tick():
+            pass
+        return list(zip(self.status, self.messages))
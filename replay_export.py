@@ -0,0 +1,116 @@
+"""
+Render replays without a screen, e.g. on a headless server.
+
+    python replay_export.py tournament_log.jsonl replays/            # PNG frames
+    python replay_export.py tournament_log.jsonl replays/ --raw      # raw RGB video
+
+Raw output is one `<race>.rgb` file per race of packed 24 bit frames, which ffmpeg reads with
+    ffmpeg -f rawvideo -pix_fmt rgb24 -s WIDTHxHEIGHT -r FPS -i race.rgb race.mp4
+"""
+
+import os
+
+# must be set before pygame initialises its display
+os.environ.setdefault("SDL_VIDEODRIVER", "dummy")
+
+import argparse
+from typing import BinaryIO, Iterator
+
+import pygame
+
+from game import Game, Point, Status, draw_racer, interpolate, replay_player_generator
+from game_world.racetrack import RaceTrack, load_track
+from tournament import read_log
+
+FPS = 30
+FRAMES_PER_MOVE = 6
+
+
+def replay_frames(
+    track: RaceTrack, history: list[Point], frames_per_move: int = FRAMES_PER_MOVE
+) -> Iterator[pygame.Surface]:
+    """
+    Yield every frame of a replay. The track itself is only re-rendered on ticks that
+    toggled a color, all other frames reuse the cached track surface. Each frame is a
+    fresh surface, so frames can be kept after the next one is drawn.
+    """
+    if not pygame.display.get_init():
+        pygame.display.init()
+    if pygame.display.get_surface() is None:
+        # render() converts surfaces, which needs some display mode to be set
+        pygame.display.set_mode((1, 1))
+    cell_w = track.screen_size[0] / track.shape[1]
+    cell_h = track.screen_size[1] / track.shape[0]
+    game = Game(
+        replay_player_generator(list(history)), track, float("inf"), float("inf"), None
+    )
+    track_surface = game.track.render()
+    frame = pygame.Surface(track.screen_size)
+    status = Status.ONGOING
+    while status == Status.ONGOING:
+        move_start = game.pos
+        status, _ = game.tick()
+        # show a toggle from the move that made it on, as watch_replay does
+        if game.last_toggle is not None:
+            track_surface = game.track.render()
+        for i in range(frames_per_move):
+            frame.blit(track_surface, (0, 0))
+            location = interpolate(move_start, game.pos, i / frames_per_move)
+            draw_racer(frame, location, cell_w, cell_h)
+            yield frame.copy()
+    frame.blit(track_surface, (0, 0))
+    draw_racer(frame, game.pos, cell_w, cell_h)
+    yield frame
+
+
+def export_png(frames: Iterator[pygame.Surface], directory: str) -> int:
+    """Save frames as a numbered PNG sequence, returns the frame count."""
+    os.makedirs(directory, exist_ok=True)
+    count = 0
+    for count, frame in enumerate(frames, 1):
+        pygame.image.save(frame, os.path.join(directory, f"frame_{count:06d}.png"))
+    return count
+
+
+def export_raw(frames: Iterator[pygame.Surface], stream: BinaryIO) -> int:
+    """Write frames as packed RGB24 to a stream (a file or a pipe into ffmpeg)."""
+    count = 0
+    for count, frame in enumerate(frames, 1):
+        stream.write(pygame.image.tobytes(frame, "RGB"))
+    return count
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("log", help="tournament results log (JSONL)")
+    parser.add_argument("out", help="directory to write replays to")
+    parser.add_argument("--raw", action="store_true", help="write raw RGB video")
+    parser.add_argument("--frames-per-move", type=int, default=FRAMES_PER_MOVE)
+    args = parser.parse_args()
+
+    tracks: dict[str, RaceTrack] = {}
+    os.makedirs(args.out, exist_ok=True)
+    for record in read_log(args.log):
+        if record["track"] not in tracks:
+            tracks[record["track"]] = load_track(record["track"])
+        track = tracks[record["track"]]
+        # moves that weren't a pair of numbers are logged as their repr
+        history = [
+            tuple(move) if isinstance(move, list) else move
+            for move in record["history"]
+        ]
+        frames = replay_frames(track, history, args.frames_per_move)
+        name = (
+            f"{record['bot']}_{os.path.basename(record['track'])[:-4]}"
+            f"_{record['seed']}"
+        )
+        if args.raw:
+            with open(os.path.join(args.out, f"{name}.rgb"), "wb") as stream:
+                count = export_raw(frames, stream)
+        else:
+            count = export_png(frames, os.path.join(args.out, name))
+        print(f"{name}: {count} frames ({track.screen_size[0]}x{track.screen_size[1]})")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,118 @@
+"""
+Report on every bundled track with the analysis tools in `game_world`.
+
+    python report.py                 # every report
+    python report.py corridors       # just one (or a few) of them
+
+For search engine timings on large tracks, see `benchmarks/`.
+"""
+
+import argparse
+import glob
+from time import perf_counter
+
+from game_world.analysis import validate_tracks
+from game_world.certificate import certify, check_certificate
+from game_world.corridors import CorridorGraph
+from game_world.pruning import prune, pruning_report
+from game_world.racetrack import load_track
+from game_world.rollouts import random_rollouts
+from game_world.state_space import ToggleModel
+
+TRACKS = "tracks/*.pkl"
+
+
+def analysis(names: list[str]) -> None:
+    for name, result in validate_tracks(names).items():
+        verdict = (
+            f"solvable in {result.optimal_steps} steps"
+            if result.solvable
+            else "UNSOLVABLE"
+        )
+        print(
+            f"{name}: {verdict}, {result.reachable_cells} cells, "
+            f"{len(result.toggle_states)} toggle states, "
+            f"relevant colors {list(result.relevant_colors)}"
+        )
+        for problem in result.problems:
+            print(f"    {problem}")
+
+
+def pruning(names: list[str]) -> None:
+    for name in names:
+        report = pruning_report(load_track(name))
+        print(
+            f"{name}: {report.nominal_states} -> {report.pruned_states} states "
+            f"({report.reduction_factor:.1f}x), {report.reachable_states} reached, "
+            f"relevant colors {list(report.relevant_colors)} of {report.colors}"
+        )
+
+
+def corridors(names: list[str]) -> None:
+    for name in names:
+        model = prune(ToggleModel(load_track(name)))
+        graph = CorridorGraph(model)
+        cells, expanded = graph.search()
+        open_cells = int(model.open_cells(model.start_mask).sum())
+        nodes = graph.node_count(model.start_mask)
+        print(
+            f"{name}: {open_cells} open cells -> {nodes} nodes "
+            f"({open_cells / max(nodes, 1):.1f}x), {len(cells)} steps, "
+            f"{expanded} states expanded"
+        )
+
+
+def certificates(names: list[str]) -> None:
+    for name in names:
+        track = load_track(name)
+        start = perf_counter()
+        certificate = certify(track)
+        certify_time = perf_counter() - start
+        start = perf_counter()
+        problems = check_certificate(track, certificate)
+        check_time = perf_counter() - start
+        size = len(certificate.to_dict()["distances"])
+        verdict = "valid" if not problems else "; ".join(problems)
+        print(
+            f"{name}: optimal {certificate.optimal_steps}, certified in "
+            f"{certify_time * 1000:.1f}ms, checked in {check_time * 1000:.1f}ms "
+            f"({size} bytes encoded), {verdict}"
+        )
+
+
+def rollouts(names: list[str]) -> None:
+    for name in names:
+        result = random_rollouts(load_track(name), max_turns_without_progress=100, seed=0)
+        print(
+            f"{name}: {result.finish_rate:.1%} of {result.walkers} random walks finish "
+            f"(mean {result.mean_steps:.0f} steps), {result.stuck_rate:.1%} get stuck"
+        )
+
+
+REPORTS = {
+    "analysis": analysis,
+    "pruning": pruning,
+    "corridors": corridors,
+    "certificates": certificates,
+    "rollouts": rollouts,
+}
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument(
+        "reports", nargs="*", help=f"any of {', '.join(REPORTS)} (default: all)"
+    )
+    args = parser.parse_args()
+    unknown = set(args.reports) - set(REPORTS)
+    if unknown:
+        parser.error(f"unknown reports: {', '.join(sorted(unknown))}")
+
+    names = sorted(glob.glob(TRACKS))
+    for report in args.reports or REPORTS:
+        print(f"== {report}")
+        REPORTS[report](names)
+
+
+if __name__ == "__main__":
+    main()
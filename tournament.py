@@ -0,0 +1,292 @@
+import argparse
+import glob
+import json
+import os
+import platform
+import random
+from typing import Callable, Iterable
+
+from game import (
+    CLOCK,
+    DELAY,
+    REFERENCE_SECONDS,
+    Game,
+    Player,
+    Status,
+    Timing,
+    measure_reference,
+)
+from game_world.racetrack import load_track
+from best_bot import best_bot
+from greedy_bot import greedy_move
+from random_bot import random_move
+
+BOTS: dict[str, Callable[[], Player]] = {
+    "best_bot": best_bot,
+    "random_bot": lambda: random_move,
+    "greedy_bot": lambda: greedy_move,
+}
+TRACKS = sorted(glob.glob("tracks/*.pkl"))
+SEEDS = range(3)
+LOG_FILE = "tournament_log.jsonl"
+MAX_TURNS_WITHOUT_PROGRESS = 100
+# tracks whose optimal route needs longer stretches without progress than that
+# (extreme's shortest route goes 344 moves without getting closer at one point)
+TRACK_MAX_TURNS_WITHOUT_PROGRESS = {"tracks/extreme.pkl": 500}
+# CPU clocks keep verdicts the same whether races run one at a time or in parallel
+TIMING = Timing.THREAD_CPU
+CALIBRATE = True
+# calibration shared by every worker that writes logs from this directory
+SCALE_FILE = "time_scale.json"
+PREPARE_TIME = 30  # separate budget for bots with a prepare phase
+
+Key = tuple[str, str, int]  # (bot, track, seed)
+
+
+def shared_time_scale(filename: str = SCALE_FILE) -> float:
+    """
+    The time scale every worker racing from this directory uses.
+    The first worker to get here calibrates and writes the measurement out; everyone
+    else, including workers started at the same moment, reads that file instead of
+    calibrating against their own (possibly busier) view of the machine.
+    """
+    if not os.path.exists(filename):
+        measured = measure_reference()
+        calibration = {
+            "time_scale": REFERENCE_SECONDS / measured,
+            "reference_seconds": REFERENCE_SECONDS,
+            "measured_seconds": measured,
+            "machine": f"{platform.python_implementation()} {platform.python_version()}, "
+            f"{platform.machine()} {platform.node()}",
+        }
+        scratch = f"{filename}.{os.getpid()}"
+        with open(scratch, "w") as f:
+            json.dump(calibration, f)
+        try:
+            # linking fails if the file exists, so when two workers calibrate at once
+            # exactly one wins, and nobody ever reads a half written file
+            os.link(scratch, filename)
+        except FileExistsError:
+            pass
+        finally:
+            os.remove(scratch)
+    with open(filename) as f:
+        return json.load(f)["time_scale"]
+
+
+def record_key(record: dict) -> Key:
+    return record["bot"], record["track"], record["seed"]
+
+
+def read_log(filename: str) -> list[dict]:
+    """
+    Read every finished race from a results log, without changing the file.
+    A last line with no newline yet (being written, or the writer died) is left out,
+    and any other unreadable line is skipped.
+    """
+    if not os.path.exists(filename):
+        return []
+    with open(filename, "rb") as f:
+        data = f.read()
+    complete = data.rfind(b"\n") + 1
+    records = []
+    for line in data[:complete].splitlines():
+        try:
+            records.append(json.loads(line))
+        except json.JSONDecodeError:
+            continue
+    return records
+
+
+def repair_log(filename: str) -> None:
+    """
+    Cut a half written last line (the process died mid-write) off a results log, so
+    the next record starts on a fresh line. Only the process writing the log calls this.
+    """
+    if not os.path.exists(filename):
+        return
+    with open(filename, "rb+") as f:
+        data = f.read()
+        complete = data.rfind(b"\n") + 1
+        if complete < len(data):
+            f.truncate(complete)
+
+
+def append_record(filename: str, record: dict) -> None:
+    """Append one race to the log and make sure it hits the disk before moving on."""
+    line = json.dumps(record) + "\n"
+    with open(filename, "ab+") as f:
+        # never glue a record onto the end of a half written line
+        if f.seek(0, os.SEEK_END):
+            f.seek(-1, os.SEEK_END)
+            if f.read(1) != b"\n":
+                line = "\n" + line
+        f.write(line.encode())
+        f.flush()
+        os.fsync(f.fileno())
+
+
+def log_move(move) -> list[int] | str:
+    """
+    A move in a form JSON can hold, whatever the racer returned: a list of ints for
+    anything made of whole numbers (numpy ints included), its repr otherwise.
+    """
+    try:
+        values = list(move)
+        if all(int(n) == n for n in values):
+            return [int(n) for n in values]
+    except (TypeError, ValueError, OverflowError):
+        pass
+    return repr(move)
+
+
+# one instance per bot, reused across races so caches stay warm between them
+POOL: dict[str, Player] = {}
+
+
+def pooled(bot: str) -> Player:
+    """
+    Fetch the shared instance of a bot, building it on first use.
+    `Game` resets bots that support it before every race.
+    """
+    if bot not in POOL:
+        POOL[bot] = BOTS[bot]()
+    return POOL[bot]
+
+
+def max_turns_without_progress(track_file: str) -> int:
+    return TRACK_MAX_TURNS_WITHOUT_PROGRESS.get(track_file, MAX_TURNS_WITHOUT_PROGRESS)
+
+
+def run_race(bot: str, track_file: str, seed: int, time_scale: float = 1.0) -> dict:
+    random.seed(seed)
+    track = load_track(track_file)
+    dawdle_limit = max_turns_without_progress(track_file)
+    game = Game(
+        pooled(bot),
+        track,
+        CLOCK,
+        DELAY,
+        dawdle_limit,
+        TIMING,
+        time_scale,
+        PREPARE_TIME,
+    )
+    status, msg = game.play_game()
+    return {
+        "bot": bot,
+        "track": track_file,
+        "fingerprint": track.fingerprint,
+        "seed": seed,
+        "status": status.name,
+        "message": msg,
+        "steps": len(game.history),
+        "time_left": game.time,
+        "time_preparing": game.time_preparing,
+        "timing": TIMING.name,
+        "time_scale": time_scale,
+        "max_turns_without_progress": dawdle_limit,
+        "move_times": game.move_times,
+        "history": [log_move(move) for move in game.history],
+    }
+
+
+class Leaderboard:
+    """Running totals per bot, updated one race at a time."""
+
+    def __init__(self) -> None:
+        self.races: dict[str, int] = {}
+        self.finishes: dict[str, int] = {}
+        self.finish_steps: dict[str, int] = {}
+
+    def update(self, record: dict) -> None:
+        bot = record["bot"]
+        self.races[bot] = self.races.get(bot, 0) + 1
+        if record["status"] == Status.FINISH.name:
+            self.finishes[bot] = self.finishes.get(bot, 0) + 1
+            self.finish_steps[bot] = self.finish_steps.get(bot, 0) + record["steps"]
+
+    def standings(self) -> list[tuple[str, int, int, float]]:
+        """
+        Bots ranked by finishes, then by mean steps over finished races.
+
+        Returns:
+            list[tuple[str, int, int, float]]: (bot, finishes, races, mean finishing steps)
+        """
+        rows = []
+        for bot, races in self.races.items():
+            finishes = self.finishes.get(bot, 0)
+            mean_steps = (
+                self.finish_steps[bot] / finishes if finishes else float("inf")
+            )
+            rows.append((bot, finishes, races, mean_steps))
+        return sorted(rows, key=lambda row: (-row[1], row[3]))
+
+    def __str__(self) -> str:
+        return "\n".join(
+            f"{rank}. {bot}: {finishes}/{races} finished, {mean:.1f} steps on average"
+            for rank, (bot, finishes, races, mean) in enumerate(self.standings(), 1)
+        )
+
+
+def run_tournament(
+    keys: Iterable[Key], log_file: str = LOG_FILE, time_scale: float | None = None
+) -> Leaderboard:
+    """
+    Race every (bot, track, seed) key, streaming each result to the log as it finishes.
+    Keys already in the log are skipped, so an interrupted tournament can just be rerun.
+
+    Every race in one log is judged against the same budget. A resumed tournament keeps
+    the time scale its log was started with. A new one uses `time_scale` if given, else
+    the calibration shared through `SCALE_FILE`, so parallel workers with logs of their
+    own still agree.
+
+    Raises:
+        ValueError: If `time_scale` disagrees with the scale the log was started with.
+    """
+    repair_log(log_file)
+    records = read_log(log_file)
+    if records:
+        logged = records[0].get("time_scale", 1.0)
+        if time_scale is not None and time_scale != logged:
+            raise ValueError(
+                f"{log_file} was raced with time scale {logged}, not {time_scale}"
+            )
+        time_scale = logged
+    elif time_scale is None:
+        if CALIBRATE and TIMING != Timing.WALL:
+            time_scale = shared_time_scale()
+        else:
+            time_scale = 1.0
+    leaderboard = Leaderboard()
+    done: set[Key] = set()
+    for record in records:
+        leaderboard.update(record)
+        done.add(record_key(record))
+    for key in keys:
+        if key in done:
+            continue
+        record = run_race(*key, time_scale)
+        append_record(log_file, record)
+        leaderboard.update(record)
+        done.add(key)
+        print(f"{key[0]} on {key[1]} (seed {key[2]}): {record['message']}")
+    return leaderboard
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Race every bot on every track.")
+    parser.add_argument("--log", default=LOG_FILE, help="results log (JSONL)")
+    parser.add_argument(
+        "--time-scale",
+        type=float,
+        help=f"factor CPU time is charged at, the same for every worker "
+        f"(default: calibrate once into {SCALE_FILE})",
+    )
+    args = parser.parse_args()
+    keys = [(bot, track, seed) for bot in BOTS for track in TRACKS for seed in SEEDS]
+    print(run_tournament(keys, args.log, args.time_scale))
+
+
+if __name__ == "__main__":
+    main()